@@ -1,23 +1,22 @@
 # loja/User/app/DB.py
 
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 # CORREÇÃO: Importar a classe Session
 from sqlalchemy.orm import Session, sessionmaker
-from .settings import Settings
+from .lifecycle import get_engine
 
-engine = create_engine(Settings().DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# A engine é criada no primeiro uso, já dentro do worker (ver app/lifecycle.py)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
 def get_session():
     # AGORA Session está definido, pois foi importado acima
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
 
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
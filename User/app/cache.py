@@ -0,0 +1,88 @@
+# loja/User/app/cache.py
+"""
+Cache da identidade dos usuários (id -> campos de UserPublic).
+
+Evita um SELECT em `users` a cada /users/me e a cada refresh de token.
+LRU com TTL, por processo: alterações feitas por este processo invalidam as
+entradas na hora (eventos do SQLAlchemy); as de outros workers expiram em
+USER_CACHE_TTL segundos.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from . import models, schemas
+from .lifecycle import get_settings
+
+
+class TTLCache:
+    """Dicionário LRU limitado a `max_size` entradas que expiram após `ttl` segundos."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _UserCaches:
+    """Índice por id, criado no primeiro uso (após ler as configurações)."""
+
+    def __init__(self):
+        self._by_id = None
+
+    @property
+    def by_id(self) -> TTLCache:
+        if self._by_id is None:
+            settings = get_settings()
+            self._by_id = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+        return self._by_id
+
+
+user_cache = _UserCaches()
+
+
+def get_by_id(user_id: int) -> schemas.UserPublic | None:
+    return user_cache.by_id.get(user_id)
+
+
+def remember(user) -> schemas.UserPublic:
+    """Guarda o usuário no cache e retorna a versão pública."""
+    public = schemas.UserPublic.model_validate(user)
+    user_cache.by_id.set(public.id, public)
+    return public
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate(mapper, connection, target):
+    user_cache.by_id.delete(target.id)
@@ -1,11 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from . import execution, lifecycle, profiling
 from .routers import users, auth
 
 app = FastAPI(
     title='Microserviço de Usuários e Autenticação',
     description='API para gerenciar usuários e autenticação.',
-    version='1.0.0'
+    version='1.0.0',
+    lifespan=lifecycle.lifespan
 )
 
 app.add_middleware(
@@ -16,8 +18,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profiling sob demanda (cabeçalho X-Profile ou amostragem); envolve os demais middlewares
+profiling.configure(
+    'user-service',
+    token=lifecycle.get_settings().PROFILING_TOKEN,
+    sample_rate=lifecycle.get_settings().PROFILING_SAMPLE_RATE,
+    directory=lifecycle.get_settings().PROFILING_DIR,
+    max_artifacts=lifecycle.get_settings().PROFILING_MAX_ARTIFACTS
+)
+app.add_middleware(profiling.ProfilingMiddleware)
+app.include_router(profiling.router)
+
 app.include_router(users.router)
 app.include_router(auth.router)
+app.include_router(lifecycle.router)
+app.include_router(execution.router)
 
 @app.get("/")
 def read_root():
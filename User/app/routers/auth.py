@@ -5,8 +5,9 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 from .. import DB, schemas, models, security
+from ..execution import InstrumentedRoute
 
-router = APIRouter(prefix='/auth', tags=['auth'])
+router = APIRouter(prefix='/auth', tags=['auth'], route_class=InstrumentedRoute)
 
 
 @router.post('/token', response_model=schemas.Token)
@@ -34,7 +35,7 @@ def login_for_access_token(
 # A rota refresh_access_token também deve usar user.id
 @router.post('/refresh_token', response_model=schemas.Token)
 def refresh_access_token(
-        user: models.User = Depends(security.get_current_user)
+        user: schemas.UserPublic = Depends(security.get_current_user)
 ):
     # CORREÇÃO: Usar o ID do usuário para o novo token
     new_access_token = security.create_access_token(data={'sub': str(user.id)})
@@ -3,16 +3,17 @@ from typing import Annotated
 from http import HTTPStatus
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from .. import models, schemas, DB
+from ..execution import InstrumentedRoute
 from ..security import get_password, T_CurrentUser  # T_CurrentUser é a nova dependência
 
 # Alias para dependências
 T_Session = Annotated[Session, Depends(DB.get_session)]
 
-router = APIRouter(prefix='/users', tags=['users'])
+router = APIRouter(prefix='/users', tags=['users'], route_class=InstrumentedRoute)
 
 
 @router.post(
@@ -20,32 +21,23 @@ router = APIRouter(prefix='/users', tags=['users'])
 )
 def create_user(user: schemas.UserCreate, session: T_Session):
     """Cria um novo usuário no sistema (rota de registro)."""
-    # ... (Lógica de verificação de username e email) ...
-    db_user_username = session.scalar(
-        select(models.User).where(models.User.username == user.username)
-    )
-    if db_user_username:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='Username already registered',
-        )
-
-    db_user_email = session.scalar(
-        select(models.User).where(models.User.email == user.email)
-    )
-    if db_user_email:
-        raise HTTPException(
-            status_code=HTTPStatus.BAD_REQUEST,
-            detail='Email already registered',
-        )
-
+    # Um único INSERT: as constraints UNIQUE de username e email detectam duplicatas
     db_user = models.User(
         username=user.username,
         password=get_password(user.password),
         email=user.email,
     )
     session.add(db_user)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        diag = getattr(e.orig, 'diag', None)
+        constraint = getattr(diag, 'constraint_name', None) or str(e.orig)
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Email already registered' if 'email' in constraint else 'Username already registered',
+        )
     session.refresh(db_user)
 
     return db_user
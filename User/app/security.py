@@ -1,4 +1,4 @@
-from .settings import Settings
+from .lifecycle import get_settings
 from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 from typing import Annotated # NOVO: Import adicionado
@@ -8,10 +8,11 @@ from jwt import DecodeError, decode, encode, ExpiredSignatureError
 from pwdlib import PasswordHash
 from sqlalchemy import select
 from sqlalchemy.orm import Session
+from . import cache
 from .DB import get_session
 from .models import User
+from .schemas import UserPublic
 
-settings = Settings()
 pwd_context = PasswordHash.recommended()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
@@ -22,6 +23,7 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 def create_access_token(data: dict):
+    settings = get_settings()
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -39,6 +41,7 @@ def get_current_user(
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
+    settings = get_settings()
     try:
         payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         subject_username = payload.get('sub')
@@ -47,10 +50,21 @@ def get_current_user(
     except (DecodeError, ExpiredSignatureError):
         raise credentials_exception
 
-    user = session.scalar(select(User).where(User.username == subject_username))
-    if not user:
+    # O /auth/token sempre emitiu o ID como 'sub' (o Gateway também o lê assim).
+    # Não há fallback por username: um username só de dígitos seria confundido com um ID.
+    try:
+        user_id = int(subject_username)
+    except ValueError:
         raise credentials_exception
-    return user
+
+    user = cache.get_by_id(user_id)
+    if user:
+        return user
+
+    db_user = session.scalar(select(User).where(User.id == user_id))
+    if not db_user:
+        raise credentials_exception
+    return cache.remember(db_user)
 
 
 def get_current_user_from_gateway(
@@ -67,15 +81,19 @@ def get_current_user_from_gateway(
             detail='Missing X-User-ID header. Request must pass through API Gateway.',
         )
 
-    # Busca o usuário pelo ID no banco de dados
-    user = session.scalar(select(User).where(User.id == x_user_id))
+    # Consulta o cache antes do banco (ver app/cache.py)
+    user = cache.get_by_id(x_user_id)
+    if user:
+        return user
+
+    db_user = session.scalar(select(User).where(User.id == x_user_id))
 
-    if not user:
+    if not db_user:
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='User not found.',
         )
-    return user
+    return cache.remember(db_user)
 
 # NOVO: Alias de tipo para ser usado nas rotas protegidas
-T_CurrentUser = Annotated[User, Depends(get_current_user_from_gateway)]
\ No newline at end of file
+T_CurrentUser = Annotated[UserPublic, Depends(get_current_user_from_gateway)]
\ No newline at end of file
@@ -6,4 +6,22 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Pool de conexões (app/lifecycle.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_WARMUP: int = 5  # conexões abertas antes de o worker ficar pronto
+
+    # Threads para rotas síncronas (app/execution.py); padrão: DB_POOL_SIZE + DB_MAX_OVERFLOW
+    THREADPOOL_SIZE: int | None = None
+
+    # Cache de identidade dos usuários (app/cache.py)
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: float = 60.0  # segundos
+
+    # Profiling sob demanda (app/profiling.py)
+    PROFILING_TOKEN: str | None = None  # habilita o cabeçalho X-Profile
+    PROFILING_SAMPLE_RATE: float = 0.0  # fração das requisições perfiladas (perfil de CPU requer pyinstrument)
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_MAX_ARTIFACTS: int = 200
+
     model_config = SettingsConfigDict(env_file=".env")
\ No newline at end of file
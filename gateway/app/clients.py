@@ -0,0 +1,21 @@
+# loja/gateway/app/clients.py
+"""
+Clientes HTTP para os microsserviços.
+
+Na implantação distribuída as chamadas usam TCP. No modo monolito (ver
+monolith/) o processo registra em SERVICE_TRANSPORTS um transporte em processo
+(httpx.ASGITransport) para a URL de cada serviço; o mesmo código de proxy passa
+a chamar os apps ASGI diretamente, sem sair do processo.
+"""
+import httpx
+
+from .profiling import HTTPX_EVENT_HOOKS
+
+# URL base do serviço (ex.: "http://3.20.238.211:8001") -> transporte
+SERVICE_TRANSPORTS: dict[str, httpx.AsyncBaseTransport] = {}
+
+
+def service_client(**kwargs) -> httpx.AsyncClient:
+    """AsyncClient que usa o transporte registrado para a URL, ou TCP se não houver."""
+    # Os hooks registram as chamadas nas requisições perfiladas (app/profiling.py)
+    return httpx.AsyncClient(mounts=dict(SERVICE_TRANSPORTS), event_hooks=HTTPX_EVENT_HOOKS, **kwargs)
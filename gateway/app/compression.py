@@ -0,0 +1,194 @@
+# loja/gateway/app/compression.py
+"""
+Compressão de respostas negociada pelo Accept-Encoding.
+
+- gzip sempre; brotli (br) e zstd quando os pacotes `brotli`/`zstandard`
+  estiverem instalados. A ordem de preferência do servidor decide empates de q.
+- Respostas menores que `minimum_size` seguem sem compressão.
+- Respostas em streaming (mais de uma mensagem de body) são comprimidas de
+  forma incremental, com flush a cada pedaço.
+- Respostas que já têm Content-Encoding (ex.: repassadas comprimidas pelo
+  microsserviço) não são recomprimidas; Server-Sent Events também não.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Dependência opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Dependência opcional
+    zstandard = None
+
+DEFAULT_MINIMUM_SIZE = 1024
+SKIP_CONTENT_TYPES = (b"text/event-stream",)
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+# Ordem de preferência do servidor
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _ZstdEncoder
+if brotli is not None:
+    ENCODERS["br"] = _BrotliEncoder
+ENCODERS["gzip"] = _GzipEncoder
+
+
+def available_encodings() -> list[str]:
+    return list(ENCODERS)
+
+
+def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """Interpreta o cabeçalho Accept-Encoding em {codificação: q}."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    return accepted
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Escolhe a melhor codificação disponível aceita pelo cliente."""
+    accepted = accepted_encodings(accept_encoding)
+    best, best_q = None, 0.0
+    for name in ENCODERS:
+        q = accepted.get(name, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def upstream_accept_encoding(client_accept_encoding: str) -> str:
+    """
+    Accept-Encoding para repassar a outro serviço: as codificações que o
+    cliente aceita com q=1 e as demais disponíveis com q=0.1. Assim a
+    negociação do serviço (por q, e só no empate pela ordem de ENCODERS)
+    escolhe uma que pode ser repassada ao cliente sem recomprimir.
+    """
+    client = accepted_encodings(client_accept_encoding)
+    return ", ".join(
+        f"{name};q={'1' if client.get(name, client.get('*', 0.0)) > 0 else '0.1'}"
+        for name in ENCODERS
+    )
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = DEFAULT_MINIMUM_SIZE, level: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.level, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str, level: int, minimum_size: int):
+        self._send = send
+        self._encoding = encoding
+        self._level = level
+        self._minimum_size = minimum_size
+        self._start_message = None
+        self._encoder = None
+        self._passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self._start_message = message
+            headers = dict(message.get("headers", []))
+            if (
+                b"content-encoding" in headers
+                or headers.get(b"content-type", b"").startswith(SKIP_CONTENT_TYPES)
+                or message["status"] in (204, 304)
+            ):
+                self._passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._encoder is None:
+            if not more_body and len(body) < self._minimum_size:
+                # Resposta pequena: não compensa comprimir
+                self._passthrough = True
+                await self._send(self._start_message)
+                await self._send(message)
+                return
+
+            self._encoder = ENCODERS[self._encoding](self._level)
+            await self._send(self._compressed_start())
+
+        data = self._encoder.compress(body) if body else b""
+        if not more_body:
+            data += self._encoder.finish()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    def _compressed_start(self):
+        headers = [
+            (name, value) for name, value in self._start_message.get("headers", [])
+            if name.lower() not in (b"content-length", b"content-encoding")
+        ]
+        headers.append((b"content-encoding", self._encoding.encode()))
+        vary = [value for name, value in headers if name.lower() == b"vary"]
+        if not any(b"accept-encoding" in v.lower() for v in vary):
+            headers.append((b"vary", b"Accept-Encoding"))
+        return {**self._start_message, "headers": headers}
@@ -1,24 +1,61 @@
 # loja/gateway/app/main.py
 from http import HTTPStatus
 from typing import Annotated, List
+from datetime import datetime
 import json
+import os
 
 from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request, Response, Header
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 import httpx
 import jwt  # Para simular a decodificação do token
 from pydantic import BaseModel, Field
 
+from . import profiling
+from .clients import service_client
+from .compression import CompressionMiddleware, accepted_encodings, upstream_accept_encoding
+from .rate_limit import AdmissionControlMiddleware, enforce_rate_limit, metrics as admission_metrics
 
-USER_SERVICE_URL = "http://3.137.142.190:8000"
-PRODUCT_SERVICE_URL = "http://3.20.238.211:8001"
-SALES_SERVICE_URL = "http://3.133.90.240:8002"
+
+# URLs dos microsserviços (sobrescritas por variáveis de ambiente)
+USER_SERVICE_URL = os.getenv("USER_SERVICE_URL", "http://3.137.142.190:8000")
+PRODUCT_SERVICE_URL = os.getenv("PRODUCT_SERVICE_URL", "http://3.20.238.211:8001")
+SALES_SERVICE_URL = os.getenv("SALES_SERVICE_URL", "http://3.133.90.240:8002")
 
 # A SECRET_KEY DEVE SER A MESMA USADA NO USER-SERVICE para decodificação local
 # Em um cenário ideal, o gateway buscaria uma chave pública, mas para simplificação:
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 
+# Chamadas aos microsserviços: timeout curto + retentativa. POST só é reenviado
+# quando o cliente manda Idempotency-Key (os serviços deduplicam pela chave).
+PROXY_TIMEOUT = 5
+PROXY_RETRIES = 1
+
+# Feed de alterações (SSE): tempo máximo sem receber nada do serviço, nem o
+# heartbeat (15 s), antes de encerrar a conexão para o cliente reconectar
+CHANGE_FEED_READ_TIMEOUT = 45  # segundos
+
+# Profiling sob demanda (app/profiling.py): token do cabeçalho X-Profile e amostragem
+# (na amostragem, o perfil de CPU requer pyinstrument; sem ele, só SQL e HTTP)
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+
+# Read-your-writes entre workers dos serviços: o X-Last-Write devolvido após uma
+# escrita fica num cookie e volta como cabeçalho nas requisições seguintes
+LAST_WRITE_HEADER = "X-Last-Write"
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_MAX_AGE = 10  # segundos; maior que READ_YOUR_WRITES_SECONDS dos serviços
+
+# Respostas menores que isso não são comprimidas
+COMPRESSION_MIN_SIZE = 1024  # bytes
+
+# Cabeçalhos da resposta do microsserviço que não são repassados como estão
+# (o corpo pode ter sido descomprimido e o tamanho é recalculado)
+HOP_BY_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
 # Esquema de autenticação para extrair o token do cabeçalho
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
@@ -38,6 +75,15 @@ class ProductUpdateSchema(BaseModel):
     QT: int | None = None
 
 
+class StockDecrementSchema(BaseModel):
+    QT: int = Field(..., gt=0)
+
+
+class StockLevel(BaseModel):
+    id: int
+    QT: int
+
+
 class ProductPublic(BaseModel):
     id: int
     user_id: int
@@ -50,6 +96,11 @@ class ProductPublic(BaseModel):
         from_attributes = True
 
 
+class ProductListResponse(BaseModel):
+    products: List[ProductPublic]
+    total_count: int
+
+
 class SaleItemSchema(BaseModel):
     product_id: int
     QT: int
@@ -64,6 +115,33 @@ class SalePublic(BaseModel):
     user_id: int
     total_price: float
 
+class DailySales(BaseModel):
+    total_sales: int
+    total_amount: float
+
+
+class SaleItemReport(BaseModel):
+    product_name: str
+    quantity_sold: int
+    sale_date: datetime
+    total_price: float
+
+
+class SalesByPeriodReport(BaseModel):
+    sales: List[SaleItemReport]
+
+
+class BestSellingProduct(BaseModel):
+    product_id: int
+    product_name: str
+    total_quantity_sold: int
+    total_revenue: float
+
+
+class BestSellingProductsReport(BaseModel):
+    products: List[BestSellingProduct]
+
+
 class Token(BaseModel): # <-- GARANTA QUE ESTA CLASSE ESTÁ PRESENTE
     access_token: str
     token_type: str
@@ -104,7 +182,19 @@ def get_current_user_id(token: str = Depends(oauth2_scheme)):
         # Se a decodificação falhar (chave incorreta, expirado, etc.)
         raise credentials_exception
 
-T_CurrentUser = Annotated[dict, Depends(get_current_user_id)]
+
+async def get_admitted_user(
+        user: Annotated[dict, Depends(get_current_user_id)],
+        request: Request
+):
+    """
+    Valida o token e aplica o rate limit do usuário/rota antes de qualquer
+    chamada aos microsserviços.
+    """
+    await enforce_rate_limit(request, user["id"])
+    return user
+
+T_CurrentUser = Annotated[dict, Depends(get_admitted_user)]
 
 # --- API GATEWAY APP ---
 app = FastAPI(
@@ -113,6 +203,31 @@ app = FastAPI(
     version='1.0.0'
 )
 
+# Load shedding: rejeita com 503 quando a fila de requisições do worker está cheia
+app.add_middleware(AdmissionControlMiddleware)
+# Compressão negociada (gzip/br/zstd); respostas já comprimidas pelos serviços passam direto
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+# Profiling sob demanda (cabeçalho X-Profile ou amostragem); envolve os demais middlewares
+profiling.configure('gateway', token=PROFILING_TOKEN, sample_rate=PROFILING_SAMPLE_RATE, directory=PROFILING_DIR)
+app.add_middleware(profiling.ProfilingMiddleware)
+app.include_router(profiling.router)
+
+
+@app.get("/metrics/admission", tags=["metrics"])
+async def read_admission_metrics():
+    """Contadores de requisições admitidas e rejeitadas por este worker."""
+    return admission_metrics.snapshot()
+
+
+def _last_write_marker(request: Request) -> str | None:
+    """Última escrita do cliente (cabeçalho ou cookie), se for um número válido."""
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
 
 # --- FUNÇÃO DE ROTEAMENTO GENÉRICA ---
 async def proxy_request(
@@ -134,6 +249,14 @@ async def proxy_request(
         "Content-Type": "application/json"
     }
 
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key:
+        headers["Idempotency-Key"] = idempotency_key
+    last_write = _last_write_marker(request)
+    if last_write:
+        headers[LAST_WRITE_HEADER] = last_write
+    retries = PROXY_RETRIES if request.method != "POST" or idempotency_key else 0
+
     # Tratamento especial para o método GET (não tem body)
     if request.method in ["GET", "DELETE"]:
         request_data = None
@@ -145,23 +268,60 @@ async def proxy_request(
         # Para POST, PUT, PATCH, usa o body fornecido
         request_data = json.dumps(body)
 
+    # Pede a resposta comprimida ao microsserviço, preferindo as codificações que
+    # o cliente aceita: assim ela pode ser repassada sem descomprimir e recomprimir.
+    client_encodings = accepted_encodings(request.headers.get("accept-encoding", ""))
+    headers["Accept-Encoding"] = upstream_accept_encoding(request.headers.get("accept-encoding", ""))
+
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            # Envia a requisição para o microsserviço
-            response = await client.request(
+        async with service_client(timeout=PROXY_TIMEOUT) as client:
+            upstream_request = client.build_request(
                 method=request.method,
                 url=full_url,
                 headers=headers,
-                data=request_data
+                content=request_data
             )
+            # Envia a requisição para o microsserviço
+            for attempt in range(retries + 1):
+                try:
+                    response = await client.send(upstream_request, stream=True)
+                    break
+                except httpx.TransportError:
+                    # Timeout ou falha de conexão: reenvia se a operação for segura
+                    if attempt == retries:
+                        raise
+
+            try:
+                content_encoding = response.headers.get("content-encoding")
+                if content_encoding and client_encodings.get(content_encoding, client_encodings.get("*", 0)) > 0:
+                    # O cliente aceita a codificação do microsserviço: repassa os bytes comprimidos
+                    content = b"".join([chunk async for chunk in response.aiter_raw()])
+                else:
+                    content = await response.aread()
+                    content_encoding = None
+            finally:
+                await response.aclose()
+
+            response_headers = {
+                name: value for name, value in response.headers.items()
+                if name.lower() not in HOP_BY_HOP_HEADERS
+            }
+            if content_encoding:
+                response_headers["content-encoding"] = content_encoding
 
             # Retorna a resposta do microsserviço
-            return Response(
-                content=response.content,
+            proxied = Response(
+                content=content,
                 status_code=response.status_code,
-                headers=response.headers,
+                headers=response_headers,
                 media_type=response.headers.get("content-type", "application/json")
             )
+            if LAST_WRITE_HEADER in response.headers:
+                proxied.set_cookie(
+                    LAST_WRITE_COOKIE, response.headers[LAST_WRITE_HEADER],
+                    max_age=LAST_WRITE_MAX_AGE, httponly=True, samesite="lax"
+                )
+            return proxied
 
     except httpx.HTTPStatusError as e:
         # Propaga exceções HTTP de volta (NotFound, BadRequest, etc.)
@@ -212,7 +372,7 @@ async def login_for_access_token(request: Request):
     form_data_dict = {k: str(v) for k, v in form_data.items()}
 
     try:
-        async with httpx.AsyncClient(timeout=10, verify=False) as client:
+        async with service_client(timeout=10, verify=False) as client:
             # O httpx irá definir o Content-Type correto (application/x-www-form-urlencoded)
             # e serializar o dicionário 'data' para o corpo da requisição.
             response = await client.post(
@@ -256,13 +416,75 @@ async def create_product(product: ProductSchema, current_user: T_CurrentUser, re
     return await proxy_request(request, PRODUCT_SERVICE_URL, current_user, product.model_dump())
 
 
-@app.get("/api/products/", response_model=List[ProductPublic], tags=["products"])
+@app.get("/api/products/", response_model=ProductListResponse, tags=["products"])
 async def list_products(current_user: T_CurrentUser, request: Request):
     """Lista os produtos do usuário autenticado (Product-service)."""
+    # proxy_request devolve um Response: os bytes do serviço são repassados sem
+    # nova validação pelo response_model (que só documenta o formato)
     # A função proxy_request irá anexar os query parameters automaticamente
     return await proxy_request(request, PRODUCT_SERVICE_URL, current_user)
 
 
+# Declarada antes de /api/products/{product_id} para não ser capturada por ela
+@app.get("/api/products/changes", tags=["products"])
+async def product_changes(current_user: T_CurrentUser, request: Request):
+    """
+    Feed de alterações de produtos e estoque em Server-Sent Events (Product-service).
+
+    A conexão é repassada pedaço a pedaço: o Gateway só lê do serviço quando
+    consegue escrever para o cliente (backpressure), e o agrupamento de eventos
+    para clientes lentos é feito no Product-service. Se nem o heartbeat chegar
+    em CHANGE_FEED_READ_TIMEOUT, o stream termina e o EventSource reconecta.
+    """
+    client = service_client(timeout=httpx.Timeout(PROXY_TIMEOUT, read=CHANGE_FEED_READ_TIMEOUT))
+    upstream_request = client.build_request(
+        "GET",
+        f"{PRODUCT_SERVICE_URL}/products/changes",
+        headers={
+            "Authorization": f"Bearer {current_user['token']}",
+            "X-User-ID": str(current_user["id"]),
+            "Accept": "text/event-stream",
+            "Accept-Encoding": "identity"
+        }
+    )
+    try:
+        response = await client.send(upstream_request, stream=True)
+    except httpx.RequestError:
+        await client.aclose()
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail=f"Service unavailable: {PRODUCT_SERVICE_URL}"
+        )
+
+    if response.status_code != HTTPStatus.OK:
+        # Ex.: 429 (conexões demais): repassa a resposta de erro inteira
+        content = await response.aread()
+        await response.aclose()
+        await client.aclose()
+        return Response(
+            content=content,
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type", "application/json")
+        )
+
+    async def relay():
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        except httpx.TransportError:
+            pass  # Serviço caiu ou ficou mudo: encerra o stream
+        finally:
+            # Também executado quando o cliente desconecta (o gerador é cancelado)
+            await response.aclose()
+            await client.aclose()
+
+    return StreamingResponse(
+        relay(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/products/{product_id}", response_model=ProductPublic, tags=["products"])
 async def get_product(product_id: int, current_user: T_CurrentUser, request: Request):
     """Obtém um produto por ID (Product-service)."""
@@ -280,6 +502,17 @@ async def update_product(
     return await proxy_request(request, PRODUCT_SERVICE_URL, current_user, product.model_dump(exclude_unset=True))
 
 
+@app.post("/api/products/{product_id}/stock/decrement", response_model=StockLevel, tags=["products"])
+async def decrement_product_stock(
+        product_id: int,
+        decrement: StockDecrementSchema,
+        current_user: T_CurrentUser,
+        request: Request
+):
+    """Dá baixa no estoque de forma atômica, sem ler e regravar o `QT` (Product-service)."""
+    return await proxy_request(request, PRODUCT_SERVICE_URL, current_user, decrement.model_dump())
+
+
 @app.delete("/api/products/{product_id}", status_code=HTTPStatus.NO_CONTENT, tags=["products"])
 async def delete_product(product_id: int, current_user: T_CurrentUser, request: Request):
     """Deleta um produto (Product-service)."""
@@ -296,5 +529,23 @@ async def create_sale(sale: SaleSchema, current_user: T_CurrentUser, request: Re
     # O Sales-service lida com a comunicação com o Product-service para dar baixa no estoque.
     return await proxy_request(request, SALES_SERVICE_URL, current_user, sale.model_dump())
 
-# Você pode adicionar rotas de relatórios de venda aqui, roteando para o Sales-Service
-# ...
\ No newline at end of file
+
+# Relatórios: o Sales-service os responde só com SQL local (sem chamar o Product-service).
+# Os query parameters (day, start, end, limit) são repassados pelo proxy_request.
+
+@app.get("/api/sales/reports/daily", response_model=DailySales, tags=["sales"])
+async def daily_report(current_user: T_CurrentUser, request: Request):
+    """Total de vendas e faturamento de um dia (Sales-service)."""
+    return await proxy_request(request, SALES_SERVICE_URL, current_user)
+
+
+@app.get("/api/sales/reports/by-period", response_model=SalesByPeriodReport, tags=["sales"])
+async def report_by_period(current_user: T_CurrentUser, request: Request):
+    """Itens vendidos num período (Sales-service)."""
+    return await proxy_request(request, SALES_SERVICE_URL, current_user)
+
+
+@app.get("/api/sales/reports/best-selling", response_model=BestSellingProductsReport, tags=["sales"])
+async def best_selling_products(current_user: T_CurrentUser, request: Request):
+    """Produtos mais vendidos num período (Sales-service)."""
+    return await proxy_request(request, SALES_SERVICE_URL, current_user)
\ No newline at end of file
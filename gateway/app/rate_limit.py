@@ -0,0 +1,266 @@
+# loja/gateway/app/rate_limit.py
+"""
+Controle de admissão do Gateway.
+
+Duas camadas, ambas aplicadas ANTES de qualquer chamada aos microsserviços:
+
+1. Rate limiting por usuário e por rota (token bucket), com o ID vindo de
+   `get_current_user_id`. O estado fica em memória por padrão; com
+   RATE_LIMIT_BACKEND=redis os buckets são compartilhados entre workers/instâncias.
+2. Load shedding baseado no tempo de fila: um limite de requisições simultâneas
+   e um tempo máximo de espera por vaga. Quando a fila está persistentemente
+   cheia (estilo CoDel), o tempo de espera tolerado cai para o alvo e o excesso
+   é rejeitado cedo com 503.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, defaultdict
+from http import HTTPStatus
+
+from fastapi import HTTPException, Request
+
+# --- CONFIGURAÇÃO (variáveis de ambiente) ---
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" ou "redis"
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+# Limite global por usuário (todas as rotas somadas): tokens/segundo e rajada
+USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "20"))
+USER_BURST = int(os.getenv("RATE_LIMIT_USER_BURST", "40"))
+
+# Limites específicos por rota: "MÉTODO /caminho" -> (tokens/segundo, rajada).
+# create_sale gera 2N chamadas ao Product-service, então é bem mais restrito.
+ROUTE_LIMITS: dict[str, tuple[float, int]] = {
+    "POST /api/sales/": (2.0, 5),
+    "POST /api/products/": (5.0, 10),
+    # Conexões do feed de alterações: evita tempestade de reconexões
+    "GET /api/products/changes": (0.2, 5),
+}
+
+# Load shedding
+MAX_CONCURRENT_REQUESTS = int(os.getenv("GATEWAY_MAX_CONCURRENT_REQUESTS", "200"))
+MAX_QUEUE_TIME = float(os.getenv("GATEWAY_MAX_QUEUE_TIME", "1.0"))  # segundos
+TARGET_QUEUE_TIME = float(os.getenv("GATEWAY_TARGET_QUEUE_TIME", "0.05"))  # segundos
+SHEDDING_INTERVAL = float(os.getenv("GATEWAY_SHEDDING_INTERVAL", "0.5"))  # segundos
+
+# Caminhos que nunca passam pelo controle de admissão. O feed de alterações
+# (SSE) fica aberto por horas e ocuparia uma vaga o tempo todo; ele continua
+# sujeito ao rate limit na abertura da conexão.
+EXEMPT_PATHS = ("/metrics", "/docs", "/openapi.json", "/redoc", "/api/products/changes")
+
+
+# --------------------------------------------------------------------------
+# MÉTRICAS
+# --------------------------------------------------------------------------
+class AdmissionMetrics:
+    """Contadores simples de requisições admitidas e rejeitadas (por worker)."""
+
+    def __init__(self):
+        self.admitted = 0
+        self.rejected_rate_limit = 0
+        self.rejected_overload = 0
+        self.rejected_by_route: dict[str, int] = defaultdict(int)
+        self.in_flight = 0
+        self.waiting = 0
+        self.queue_time_ewma = 0.0
+
+    def observe_queue_time(self, seconds: float):
+        self.queue_time_ewma = 0.9 * self.queue_time_ewma + 0.1 * seconds
+
+    def snapshot(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "rejected_rate_limit": self.rejected_rate_limit,
+            "rejected_overload": self.rejected_overload,
+            "rejected_by_route": dict(self.rejected_by_route),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "queue_time_ewma_ms": round(self.queue_time_ewma * 1000, 3),
+        }
+
+
+metrics = AdmissionMetrics()
+
+
+# --------------------------------------------------------------------------
+# TOKEN BUCKETS
+# --------------------------------------------------------------------------
+class InMemoryBucketBackend:
+    """Token buckets locais ao processo. Cada worker do gunicorn tem os seus."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._max_keys = max_keys
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        """Consome 1 token. Retorna 0 se permitido ou os segundos até o próximo token."""
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - last) * rate)
+
+        if tokens >= 1:
+            self._store(key, tokens - 1, now)
+            return 0.0
+
+        self._store(key, tokens, now)
+        return (1 - tokens) / rate
+
+    def _store(self, key: str, tokens: float, now: float):
+        self._buckets[key] = (tokens, now)
+        # LRU: o bucket usado vai para o fim; o menos usado recentemente sai primeiro
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+
+
+class RedisBucketBackend:
+    """Token buckets compartilhados via Redis (script Lua atômico)."""
+
+    _SCRIPT = """
+    local key = KEYS[1]
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + (now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str):
+        # Dependência opcional: só é necessária com RATE_LIMIT_BACKEND=redis
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self._SCRIPT)
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        wait = await self._script(keys=[f"ratelimit:{key}"], args=[rate, burst, time.time()])
+        return float(wait)
+
+
+def _create_backend():
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBucketBackend(RATE_LIMIT_REDIS_URL)
+    return InMemoryBucketBackend()
+
+
+bucket_backend = _create_backend()
+
+
+def _route_key(request: Request) -> str:
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    return f"{request.method} {path}"
+
+
+def _too_many_requests(route_key: str, retry_after: float):
+    metrics.rejected_rate_limit += 1
+    metrics.rejected_by_route[route_key] += 1
+    return HTTPException(
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        detail="Rate limit exceeded",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def enforce_rate_limit(request: Request, user_id: int):
+    """
+    Aplica o limite global do usuário e o limite específico da rota.
+    Levanta 429 com Retry-After se algum dos buckets estiver vazio.
+    """
+    route_key = _route_key(request)
+
+    wait = await bucket_backend.consume(f"user:{user_id}", USER_RATE, USER_BURST)
+    if wait:
+        raise _too_many_requests(route_key, wait)
+
+    route_limit = ROUTE_LIMITS.get(route_key)
+    if route_limit:
+        rate, burst = route_limit
+        wait = await bucket_backend.consume(f"user:{user_id}:{route_key}", rate, burst)
+        if wait:
+            raise _too_many_requests(route_key, wait)
+
+
+# --------------------------------------------------------------------------
+# LOAD SHEDDING
+# --------------------------------------------------------------------------
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI que limita as requisições simultâneas do worker.
+
+    Uma requisição espera por uma vaga no máximo MAX_QUEUE_TIME. Se o menor
+    tempo de fila observado no último SHEDDING_INTERVAL ficou acima de
+    TARGET_QUEUE_TIME, a fila é considerada "parada" e a espera tolerada cai
+    para TARGET_QUEUE_TIME, descartando o excesso rapidamente.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._interval_start = time.monotonic()
+        self._interval_min_wait = math.inf
+        self._overloaded = False
+
+    def _record_wait(self, waited: float):
+        metrics.observe_queue_time(waited)
+        self._interval_min_wait = min(self._interval_min_wait, waited)
+
+        now = time.monotonic()
+        if now - self._interval_start >= SHEDDING_INTERVAL:
+            self._overloaded = self._interval_min_wait > TARGET_QUEUE_TIME
+            self._interval_start = now
+            self._interval_min_wait = math.inf
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        timeout = TARGET_QUEUE_TIME if self._overloaded else MAX_QUEUE_TIME
+        start = time.monotonic()
+        metrics.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._record_wait(time.monotonic() - start)
+            metrics.rejected_overload += 1
+            await self._reject(send)
+            return
+        finally:
+            metrics.waiting -= 1
+
+        self._record_wait(time.monotonic() - start)
+        metrics.admitted += 1
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            metrics.in_flight -= 1
+            self._semaphore.release()
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "Gateway overloaded, try again later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": HTTPStatus.SERVICE_UNAVAILABLE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"1"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
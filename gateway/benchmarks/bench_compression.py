@@ -0,0 +1,87 @@
+# loja/gateway/benchmarks/bench_compression.py
+"""
+Benchmark de compressão: banda economizada vs. CPU gasta, por rota.
+
+Gera payloads JSON com o formato das respostas de cada rota (listagem de
+produtos, relatório por período) em vários tamanhos e, para cada codificação
+disponível (gzip sempre; br/zstd se instalados) e nível, mede a razão de
+compressão e o tempo de compressão/descompressão. Não precisa dos serviços.
+
+Uso (a partir de gateway/):
+    python -m benchmarks.bench_compression --levels 1 5 9
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+
+from app.compression import ENCODERS, brotli, zstandard
+
+
+def products_payload(rows: int) -> bytes:
+    products = [
+        {"id": i, "name": f"Produto {i} {random.choice(['azul', 'verde', 'grande', 'promo'])}",
+         "price": round(random.uniform(1, 500), 2), "QT": random.randint(0, 1000), "user_id": 1}
+        for i in range(rows)
+    ]
+    return json.dumps({"products": products, "total_count": rows}).encode()
+
+
+def report_payload(rows: int) -> bytes:
+    sales = [
+        {"product_name": f"Produto {random.randint(1, 200)}", "quantity_sold": random.randint(1, 5),
+         "sale_date": f"2025-10-{random.randint(1, 28):02d}T12:{random.randint(0, 59):02d}:00",
+         "total_price": round(random.uniform(1, 1000), 2)}
+        for _ in range(rows)
+    ]
+    return json.dumps({"sales": sales}).encode()
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def measure(encoding: str, level: int, payload: bytes, repeat: int) -> tuple[int, float, float]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encoder = ENCODERS[encoding](level)
+        compressed = encoder.compress(payload) + encoder.finish()
+    compress_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decompress(encoding, compressed)
+    decompress_time = (time.perf_counter() - start) / repeat
+    return len(compressed), compress_time, decompress_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 5, 9])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    routes = {"GET /api/products/": products_payload, "GET /api/sales/reports/by-period": report_payload}
+
+    print(f"{'route':<34} {'rows':>5} {'enc':>5} {'lvl':>3} {'bytes':>9} {'ratio':>6} "
+          f"{'comp µs':>9} {'decomp µs':>9} {'MB/s':>7}")
+    for route, build in routes.items():
+        for rows in args.rows:
+            payload = build(rows)
+            print(f"{route:<34} {rows:>5} {'-':>5} {'-':>3} {len(payload):>9} {1.0:>6.2f}")
+            for encoding in ENCODERS:
+                for level in args.levels:
+                    size, comp, decomp = measure(encoding, level, payload, args.repeat)
+                    print(f"{route:<34} {rows:>5} {encoding:>5} {level:>3} {size:>9} "
+                          f"{len(payload) / size:>6.2f} {comp * 1e6:>9.0f} {decomp * 1e6:>9.0f} "
+                          f"{len(payload) / comp / 1e6:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
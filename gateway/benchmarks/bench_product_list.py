@@ -0,0 +1,107 @@
+# loja/gateway/benchmarks/bench_product_list.py
+"""
+Benchmark de GET /api/products/ (páginas de 100 e 1000 linhas) pelo Gateway.
+
+Sobe o Gateway com uvicorn apontando para um Product-service já em execução
+(--product-url), com rate limit alto para não interferir, cria os produtos
+de um usuário de teste direto no Product-service e mede a latência da mesma
+página chamando o serviço direto e pelo Gateway (diferença = custo do proxy).
+O token é gerado localmente com a SECRET_KEY do Gateway.
+
+Uso (a partir de gateway/):
+    python -m benchmarks.bench_product_list --product-url http://127.0.0.1:8001 --rows 100 1000
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+import jwt
+
+from app.main import ALGORITHM, SECRET_KEY
+
+BENCH_USER_ID = 999_999
+
+
+def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{url} não ficou pronto a tempo")
+
+
+def seed(client: httpx.Client, product_url: str, rows: int) -> list[int]:
+    headers = {"X-User-ID": str(BENCH_USER_ID)}
+    ids = []
+    for i in range(rows):
+        response = client.post(f"{product_url}/products/", headers=headers, json={
+            "name": f"Produto {i}", "description": "bench", "price": 10.0 + i % 100, "QT": i
+        })
+        response.raise_for_status()
+        ids.append(response.json()["id"])
+    return ids
+
+
+def measure(client: httpx.Client, url: str, headers: dict, repeat: int) -> tuple[float, float, int]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    return statistics.median(latencies) * 1000, p95 * 1000, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--product-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--port", type=int, default=18000)
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "PRODUCT_SERVICE_URL": args.product_url,
+        "RATE_LIMIT_USER_RATE": "1000000",
+        "RATE_LIMIT_USER_BURST": "1000000",
+    }
+    gateway = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    gateway_url = f"http://127.0.0.1:{args.port}"
+    token = jwt.encode({"sub": str(BENCH_USER_ID)}, SECRET_KEY, algorithm=ALGORITHM)
+
+    with httpx.Client(timeout=30) as client:
+        ids = seed(client, args.product_url, max(args.rows))
+        try:
+            wait_ready(f"{gateway_url}/metrics/admission")
+            print(f"{'rota':<26} {'via':<8} {'p50 ms':>8} {'p95 ms':>8} {'bytes':>8}")
+            for rows in args.rows:
+                targets = {
+                    "direto": (f"{args.product_url}/products/?limit={rows}", {"X-User-ID": str(BENCH_USER_ID)}),
+                    "gateway": (f"{gateway_url}/api/products/?limit={rows}", {"Authorization": f"Bearer {token}"}),
+                }
+                for via, (url, headers) in targets.items():
+                    p50, p95, size = measure(client, url, headers, args.repeat)
+                    print(f"{f'GET /api/products/ x{rows}':<26} {via:<8} {p50:>8.2f} {p95:>8.2f} {size:>8}")
+        finally:
+            for product_id in ids:
+                client.delete(f"{args.product_url}/products/{product_id}", headers={"X-User-ID": str(BENCH_USER_ID)})
+            gateway.terminate()
+            gateway.wait()
+
+
+if __name__ == "__main__":
+    main()
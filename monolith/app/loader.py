@@ -0,0 +1,66 @@
+# loja/monolith/app/loader.py
+"""
+Importa o pacote `app` de cada serviço sob um nome próprio.
+
+Os quatro serviços usam o mesmo nome de pacote (`app`) e imports relativos;
+cada um é registrado em sys.modules com um alias (ex.: `product_service`), de
+modo que `product_service.main`, `sales_service.main`, ... convivem no mesmo
+processo sem alterar o código dos serviços.
+"""
+import importlib
+import importlib.machinery
+import importlib.util
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from types import ModuleType
+
+# Raiz do repositório (monolith/app/loader.py -> ../../)
+ROOT = Path(__file__).resolve().parents[2]
+
+
+@contextmanager
+def _working_directory(path: Path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _import_package(alias: str, package_dir: Path) -> ModuleType:
+    init_file = package_dir / '__init__.py'
+    if init_file.exists():
+        spec = importlib.util.spec_from_file_location(
+            alias, init_file, submodule_search_locations=[str(package_dir)]
+        )
+    else:
+        # Pacote sem __init__.py (product-service, sales-service, gateway)
+        spec = importlib.machinery.ModuleSpec(alias, None, is_package=True)
+        spec.submodule_search_locations = [str(package_dir)]
+
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[alias] = package
+    if spec.loader is not None:
+        spec.loader.exec_module(package)
+    return package
+
+
+def load_service(alias: str, directory: str) -> ModuleType:
+    """Importa <directory>/app como `alias` e retorna o módulo `alias.main`."""
+    if f'{alias}.main' in sys.modules:
+        return sys.modules[f'{alias}.main']
+
+    service_dir = ROOT / directory
+    _import_package(alias, service_dir / 'app')
+
+    # Cada serviço lê o próprio .env (env_file relativo ao diretório atual), como
+    # na implantação distribuída. As configurações ficam em cache após o import.
+    with _working_directory(service_dir):
+        main = importlib.import_module(f'{alias}.main')
+        lifecycle = sys.modules.get(f'{alias}.lifecycle')
+        if lifecycle is not None:
+            lifecycle.get_settings()
+    return main
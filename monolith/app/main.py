@@ -0,0 +1,134 @@
+# loja/monolith/app/main.py
+"""
+Modo monolito: User, Product, Sales e Gateway num único processo ASGI.
+
+- Os pacotes `app` de cada serviço são importados sob nomes próprios
+  (app/loader.py), cada um com a sua configuração (.env do serviço).
+- Só o Gateway é publicado. Os demais apps ficam montados em processo: as URLs
+  já configuradas (USER_SERVICE_URL, PRODUCT_SERVICE_URL, SALES_SERVICE_URL)
+  são atendidas por httpx.ASGITransport em vez de TCP, pelo mesmo código de
+  proxy_request, get_products_from_service e do worker do outbox. Os serviços
+  confiam no X-User-ID enviado pelo Gateway, por isso não são expostos.
+- MONOLITH_TRANSPORT=http mantém essas chamadas em TCP (ex.: com um serviço
+  ainda rodando separado, ou para comparar latências).
+- O lifespan executa o lifespan de cada serviço (warm-up do pool, outbox).
+- O limiter de threads do AnyIO é um só no processo: o monolito o dimensiona
+  com a soma do que cada serviço usaria sozinho, e desliga o ajuste que cada
+  serviço faria no próprio lifespan (app/execution.py).
+
+Uso (a partir de monolith/):
+    uvicorn app.main:app --port 8000
+"""
+import asyncio
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from http import HTTPStatus
+from importlib import import_module
+
+import anyio.to_thread
+import httpx
+from fastapi import FastAPI, Response
+
+from .loader import load_service
+from .transports import StreamingASGITransport, ThreadedASGITransport, asgi_transport
+
+MONOLITH_TRANSPORT = os.getenv("MONOLITH_TRANSPORT", "asgi")  # "asgi" ou "http"
+
+user_main = load_service('user_service', 'User')
+product_main = load_service('product_service', 'product-service')
+sales_main = load_service('sales_service', 'sales-service')
+gateway_main = load_service('gateway_service', 'gateway')
+
+# Ordem de inicialização: quem é chamado sobe antes de quem chama
+SERVICES = {
+    'user': user_main.app,
+    'product': product_main.app,
+    'sales': sales_main.app,
+    'gateway': gateway_main.app,
+}
+
+# Endereços internos usados apenas por /health/ready
+_HEALTH_URLS = {name: f'http://{name}.internal' for name in SERVICES}
+
+
+def register_transports(loop: asyncio.AbstractEventLoop):
+    """Aponta as URLs configuradas nos clientes do Gateway e do Sales-service para os apps em processo."""
+    # O Gateway repassa streams longos (feed de alterações): transporte com corpo em streaming
+    gateway_clients = import_module('gateway_service.clients')
+    gateway_clients.SERVICE_TRANSPORTS.update({
+        gateway_main.USER_SERVICE_URL: StreamingASGITransport(user_main.app),
+        gateway_main.PRODUCT_SERVICE_URL: StreamingASGITransport(product_main.app),
+        gateway_main.SALES_SERVICE_URL: StreamingASGITransport(sales_main.app),
+    })
+
+    sales_clients = sales_main.clients
+    sales_clients.ASYNC_TRANSPORTS[sales_main.PRODUCT_SERVICE_URL] = asgi_transport(product_main.app)
+    # O worker do outbox roda numa thread com cliente síncrono
+    sales_clients.SYNC_TRANSPORTS[sales_main.PRODUCT_SERVICE_URL] = ThreadedASGITransport(product_main.app, loop)
+
+
+def _threadpool_size(package: str) -> int:
+    """Threads que o serviço usaria como processo próprio."""
+    try:
+        execution = import_module(f'{package}.execution')
+    except ModuleNotFoundError:
+        # Sem app/execution.py: o limite efetivo é o pool de conexões
+        settings = import_module(f'{package}.lifecycle').get_settings()
+        return settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    execution.configure_limiter = False
+    return execution.threadpool_size()
+
+
+def configure_threadpool():
+    total = sum(_threadpool_size(package) for package in ('user_service', 'product_service', 'sales_service'))
+    anyio.to_thread.current_default_thread_limiter().total_tokens = total
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MONOLITH_TRANSPORT == "asgi":
+        register_transports(asyncio.get_running_loop())
+    # Antes dos lifespans dos serviços, que não devem mais ajustar o limiter
+    configure_threadpool()
+
+    async with AsyncExitStack() as stack:
+        for service_app in SERVICES.values():
+            await stack.enter_async_context(service_app.router.lifespan_context(service_app))
+        yield
+
+
+# A documentação é a do Gateway, montado na raiz
+app = FastAPI(
+    title='Loja (monolito)',
+    lifespan=lifespan,
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None
+)
+
+
+@app.get('/health/live', tags=['health'])
+def liveness():
+    return {"status": "alive"}
+
+
+@app.get('/health/ready', tags=['health'])
+async def readiness(response: Response):
+    """Pronto quando todos os serviços com /health/ready estiverem prontos."""
+    services = {}
+    all_ready = True
+    async with httpx.AsyncClient(
+        mounts={url: asgi_transport(SERVICES[name]) for name, url in _HEALTH_URLS.items()}
+    ) as client:
+        for name in ('user', 'product', 'sales'):
+            ready = await client.get(f'{_HEALTH_URLS[name]}/health/ready')
+            services[name] = ready.json().get("status")
+            all_ready = all_ready and ready.status_code == HTTPStatus.OK
+
+    if not all_ready:
+        response.status_code = HTTPStatus.SERVICE_UNAVAILABLE
+        return {"status": "starting", "services": services}
+    return {"status": "ready", "services": services}
+
+
+app.mount('/', gateway_main.app)
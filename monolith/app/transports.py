@@ -0,0 +1,141 @@
+# loja/monolith/app/transports.py
+"""Transportes httpx que chamam um app ASGI no próprio processo."""
+import asyncio
+import contextlib
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def asgi_transport(app) -> httpx.ASGITransport:
+    # Exceções do app viram respostas 500, como aconteceria numa chamada TCP
+    return httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+
+class ThreadedASGITransport(httpx.BaseTransport):
+    """
+    Transporte síncrono para clientes usados em threads (ex.: worker do outbox).
+
+    A requisição é executada no event loop do servidor, onde o app ASGI vive,
+    e a thread aguarda o resultado. Não deve ser usado na thread do próprio
+    event loop (bloquearia o loop).
+    """
+
+    def __init__(self, app, loop: asyncio.AbstractEventLoop):
+        self._transport = asgi_transport(app)
+        self._loop = loop
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        async_request = httpx.Request(
+            request.method,
+            request.url,
+            headers=request.headers,
+            content=request.read(),
+            extensions=request.extensions,
+        )
+        future = asyncio.run_coroutine_threadsafe(self._send(async_request), self._loop)
+        return future.result()
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        content = b"".join([chunk async for chunk in response.stream])
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=content,
+            extensions=response.extensions,
+        )
+
+
+class _StreamingBody(httpx.AsyncByteStream):
+    def __init__(self, chunks: asyncio.Queue, task: asyncio.Task, disconnected: asyncio.Event):
+        self._chunks = chunks
+        self._task = task
+        self._disconnected = disconnected
+
+    async def __aiter__(self):
+        while (chunk := await self._chunks.get()) is not None:
+            yield chunk
+
+    async def aclose(self):
+        # Como uma conexão TCP fechada: o app recebe http.disconnect
+        self._disconnected.set()
+        if not self._task.done():
+            self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """
+    Como httpx.ASGITransport, mas retorna a resposta assim que os cabeçalhos
+    chegam e entrega o corpo em streaming. O httpx.ASGITransport só retorna
+    com o corpo completo, o que trava respostas longas (SSE do feed de
+    alterações). A fila de um pedaço faz o app esperar o consumidor
+    (backpressure), como numa conexão TCP.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(name.lower(), value) for name, value in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port),
+            "client": ("127.0.0.1", 123),
+            "root_path": "",
+        }
+
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=1)
+        started = asyncio.get_running_loop().create_future()
+        disconnected = asyncio.Event()
+        request_sent = False
+        body_complete = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal body_complete
+            if message["type"] == "http.response.start":
+                started.set_result(message)
+            elif message["type"] == "http.response.body" and not body_complete:
+                await chunks.put(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body_complete = True
+                    await chunks.put(None)
+
+        async def run():
+            try:
+                await self.app(scope, receive, send)
+            except Exception:
+                # Como em raise_app_exceptions=False: vira 500 (ou encerra o corpo)
+                logger.exception("Erro no app ASGI em %s %s", scope["method"], scope["path"])
+            if not started.done():
+                started.set_result({"status": 500, "headers": []})
+            if not body_complete:
+                await chunks.put(None)
+
+        task = asyncio.create_task(run())
+        message = await started
+        return httpx.Response(
+            message["status"],
+            headers=message.get("headers", []),
+            stream=_StreamingBody(chunks, task, disconnected),
+        )
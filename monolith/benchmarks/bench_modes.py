@@ -0,0 +1,150 @@
+# loja/monolith/benchmarks/bench_modes.py
+"""
+Latência: implantação distribuída (4 processos, HTTP entre serviços) vs.
+monolito (1 processo, httpx.ASGITransport entre serviços).
+
+Sobe os dois modos com uvicorn (cada serviço com o próprio .env), obtém um
+token com --username/--password, cria um produto e mede, sempre pelo Gateway
+e em sequência (uma requisição por vez, para medir latência e não vazão):
+
+- GET /api/users/me         (Gateway -> User)
+- GET /api/products/{id}    (Gateway -> Product)
+- POST /api/sales/          (Gateway -> Sales -> Product), poucas vezes e
+  espaçadas, por causa do rate limit da rota.
+
+Uso (a partir de monolith/):
+    python -m benchmarks.bench_modes --username admin --password secret --requests 500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[2]
+HOST = "127.0.0.1"
+
+
+def start(directory: Path, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", HOST, "--port", str(port),
+         "--log-level", "warning"],
+        cwd=directory,
+        env={**os.environ, **env},
+    )
+
+
+def wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"{url} não ficou pronto a tempo")
+
+
+def start_distributed(base_port: int) -> tuple[str, list[subprocess.Popen]]:
+    user, product, sales, gateway = (base_port + i for i in range(4))
+    urls = {
+        "USER_SERVICE_URL": f"http://{HOST}:{user}",
+        "PRODUCT_SERVICE_URL": f"http://{HOST}:{product}",
+        "SALES_SERVICE_URL": f"http://{HOST}:{sales}",
+    }
+    servers = [
+        start(ROOT / "User", user, urls),
+        start(ROOT / "product-service", product, urls),
+        start(ROOT / "sales-service", sales, urls),
+        start(ROOT / "gateway", gateway, urls),
+    ]
+    for port in (user, product, sales):
+        wait_ready(f"http://{HOST}:{port}/health/ready")
+    wait_ready(f"http://{HOST}:{gateway}/metrics/admission")
+    return f"http://{HOST}:{gateway}", servers
+
+
+def start_monolith(port: int) -> tuple[str, list[subprocess.Popen]]:
+    server = start(ROOT / "monolith", port, {"MONOLITH_TRANSPORT": "asgi"})
+    wait_ready(f"http://{HOST}:{port}/health/ready")
+    return f"http://{HOST}:{port}", [server]
+
+
+def measure(client: httpx.Client, method: str, url: str, n: int, pause: float = 0.0, **kwargs) -> list[float]:
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        response = client.request(method, url, **kwargs)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        if pause:
+            time.sleep(pause)
+    return latencies
+
+
+def run_mode(gateway_url: str, args) -> dict[str, list[float]]:
+    with httpx.Client(base_url=gateway_url, timeout=30) as client:
+        token = client.post("/auth/token", data={"username": args.username, "password": args.password})
+        token.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {token.json()['access_token']}"
+
+        product = client.post("/api/products/", json={"name": "bench", "price": 1.0, "QT": 1_000_000})
+        product.raise_for_status()
+        product_id = product.json()["id"]
+
+        try:
+            # Aquecimento (conexões, caches)
+            measure(client, "GET", f"/api/products/{product_id}", 20)
+            return {
+                "GET /api/users/me": measure(client, "GET", "/api/users/me", args.requests),
+                "GET /api/products/{id}": measure(client, "GET", f"/api/products/{product_id}", args.requests),
+                "POST /api/sales/": measure(
+                    client, "POST", "/api/sales/", args.sales, pause=0.5,
+                    json={"items": [{"product_id": product_id, "QT": 1}]}
+                ),
+            }
+        finally:
+            client.delete(f"/api/products/{product_id}")
+
+
+def summarize(latencies: list[float]) -> tuple[float, float]:
+    latencies = sorted(latencies)
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    return statistics.median(latencies) * 1000, p95 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--sales", type=int, default=20)
+    parser.add_argument("--port", type=int, default=18100)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, starter in (("distribuído", lambda: start_distributed(args.port)),
+                          ("monolito", lambda: start_monolith(args.port + 10))):
+        gateway_url, servers = starter()
+        try:
+            results[mode] = run_mode(gateway_url, args)
+        finally:
+            for server in servers:
+                server.terminate()
+            for server in servers:
+                server.wait()
+
+    print(f"{'rota':<24} {'modo':<12} {'p50 ms':>8} {'p95 ms':>8}")
+    for route in results["monolito"]:
+        for mode in results:
+            p50, p95 = summarize(results[mode][route])
+            print(f"{route:<24} {mode:<12} {p50:>8.2f} {p95:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# Configuração do gunicorn (usada pelo Procfile)
+import os
+
+# Padrão do gunicorn/Procfile: todas as interfaces, na porta da plataforma ($PORT)
+bind = os.getenv("BIND") or f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Cada worker tem os quatro serviços; as engines do banco de cada serviço só
+# são criadas dentro do worker (app/lifecycle.py de cada serviço).
+preload_app = True
@@ -1,17 +1,208 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
-from .settings import Settings
-from sqlalchemy.orm import sessionmaker
-
-engine = create_engine(Settings().DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-def get_session():
-    with Session(engine) as session:
+import contextvars
+import itertools
+import threading
+import time
+from typing import Annotated
+
+from fastapi import Header
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+from .lifecycle import get_engine, get_replica_engines, get_settings
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# --- RÉPLICAS DE LEITURA ---
+# Rotas somente-leitura usam get_read_session: escolhe uma réplica saudável em
+# round-robin e cai para o primário se a réplica estiver atrasada/fora do ar ou
+# se o usuário escreveu há pouco (read-your-writes).
+#
+# Read-your-writes entre processos: uma requisição que confirma uma escrita
+# responde com o cabeçalho X-Last-Write (epoch em segundos). O Gateway o
+# guarda num cookie e o reenvia nas requisições seguintes, que podem cair em
+# outro worker ou outra máquina; o registro local (_last_write) cobre o mesmo
+# processo e chamadas que não passam pelo Gateway.
+LAST_WRITE_HEADER = 'X-Last-Write'
+_replica_cycle = itertools.count()
+
+# Atraso de replicação em segundos; 0 quando a réplica já aplicou todo o WAL
+# recebido (ou quando não é uma réplica, ex.: dois bancos locais em testes).
+# NULL (réplica fora de uso) quando o WAL receiver não está rodando: réplica
+# desconectada do primário tem receive_lsn = replay_lsn, mas não recebe nada.
+_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+_health_lock = threading.Lock()
+_replica_health: dict[int, tuple[bool, float]] = {}  # índice -> (saudável, verificado_em)
+_probing: set[int] = set()  # réplicas com verificação em andamento (uma thread por vez)
+_last_write: dict[int, float] = {}  # user_id -> instante da última escrita
+# Escrita confirmada na requisição atual (preenchido no after_commit; ver WriteMarkerMiddleware)
+_request_write: contextvars.ContextVar[dict | None] = contextvars.ContextVar('request_write', default=None)
+
+
+def _replica_is_healthy(index: int) -> bool:
+    """
+    Resultado da última verificação. Quando ela vence, só uma thread consulta a
+    réplica (com connect_timeout; ver lifecycle); as demais usam o resultado
+    anterior enquanto isso, ou o primário se a réplica nunca foi verificada.
+    """
+    settings = get_settings()
+    now = time.monotonic()
+    with _health_lock:
+        healthy, checked_at = _replica_health.get(index, (False, None))
+        if checked_at is not None and now - checked_at < settings.REPLICA_CHECK_INTERVAL:
+            return healthy
+        if index in _probing:
+            return healthy
+        _probing.add(index)
+
+    try:
+        with get_replica_engines()[index].connect() as conn:
+            lag = conn.scalar(_LAG_QUERY)
+        healthy = lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+    except Exception:
+        healthy = False
+    finally:
+        with _health_lock:
+            _probing.discard(index)
+
+    with _health_lock:
+        _replica_health[index] = (healthy, time.monotonic())
+    return healthy
+
+
+def _mark_unhealthy(engine):
+    replicas = get_replica_engines()
+    if engine in replicas:
+        with _health_lock:
+            _replica_health[replicas.index(engine)] = (False, time.monotonic())
+
+
+class ReadSession(Session):
+    """
+    Sessão de leitura: se uma consulta falha na réplica (conexão perdida,
+    réplica reiniciando), marca a réplica como fora do ar e repete a consulta
+    no primário em vez de devolver 500.
+    """
+
+    def _on_primary(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except OperationalError:
+            if self.bind is get_engine():
+                raise
+            _mark_unhealthy(self.bind)
+            self.rollback()
+            self.bind = get_engine()
+            return method(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._on_primary(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._on_primary(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._on_primary(super().scalars, *args, **kwargs)
+
+
+def _wrote_recently(user_id: int | None, last_write_at: float | None) -> bool:
+    window = get_settings().READ_YOUR_WRITES_SECONDS
+    if last_write_at is not None and abs(time.time() - last_write_at) < window:
+        # Relógio de parede de outro processo: tolera pequenas diferenças entre máquinas
+        return True
+    if user_id is not None:
+        last_write = _last_write.get(user_id)
+        return last_write is not None and time.monotonic() - last_write < window
+    return False
+
+
+def _pick_read_engine(user_id: int | None, last_write_at: float | None = None):
+    if _wrote_recently(user_id, last_write_at):
+        return get_engine()
+
+    replicas = get_replica_engines()
+    for _ in range(len(replicas)):
+        index = next(_replica_cycle) % len(replicas)
+        if _replica_is_healthy(index):
+            return replicas[index]
+    return get_engine()
+
+
+def mark_write(user_id: int):
+    """Leituras deste usuário vão para o primário durante READ_YOUR_WRITES_SECONDS."""
+    _last_write[user_id] = time.monotonic()
+
+
+def mark_request_write(user_id: int):
+    """Para escritas feitas fora de get_session (ex.: baixas agrupadas em app/stock.py)."""
+    mark_write(user_id)
+    request_write = _request_write.get()
+    if request_write is not None:
+        request_write["at"] = time.time()
+
+
+@event.listens_for(Session, "after_commit")
+def _flag_commit(session):
+    session.info["committed"] = True
+    request_write = session.info.get("request_write")
+    if request_write is not None:
+        request_write["at"] = time.time()
+
+
+class WriteMarkerMiddleware:
+    """Acrescenta X-Last-Write às respostas de requisições que confirmaram uma escrita."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Um dict mutável: a sessão roda no threadpool, com uma cópia do contexto
+        request_write = {}
+        token = _request_write.set(request_write)
+
+        async def send_with_marker(message):
+            if message["type"] == "http.response.start" and "at" in request_write:
+                headers = list(message.get("headers", []))
+                headers.append((LAST_WRITE_HEADER.lower().encode(), f'{request_write["at"]:.3f}'.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_marker)
+        finally:
+            _request_write.reset(token)
+
+
+def get_session(x_user_id: Annotated[int | None, Header()] = None):
+    with Session(get_engine()) as session:
+        session.info["request_write"] = _request_write.get()
         yield session
+        if x_user_id is not None and session.info.get("committed"):
+            mark_write(x_user_id)
+
+
+def get_read_session(
+        x_user_id: Annotated[int | None, Header()] = None,
+        x_last_write: Annotated[float | None, Header()] = None
+):
+    with ReadSession(_pick_read_engine(x_user_id, x_last_write)) as session:
+        yield session
+
 
 def get_db():
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,296 @@
+# loja/product-service/app/changes.py
+"""
+Feed de alterações de produtos e estoque (Server-Sent Events por usuário).
+
+Substitui o polling de GET /products/ pelas vitrines:
+
+- Cada escrita em `products` gera um evento (`created`, `updated`, `deleted`
+  ou `stock`). Com PostgreSQL o evento é um NOTIFY no canal `product_changes`
+  dentro da própria transação: só é entregue após o commit e chega a todos os
+  workers, que o recebem por uma conexão dedicada com LISTEN (drivers psycopg2
+  ou psycopg 3; outros drivers PostgreSQL falham na inicialização). Em outros bancos
+  (ex.: SQLite em desenvolvimento) os eventos ficam na sessão e são publicados
+  no after_commit, só para o próprio processo.
+- Cada conexão SSE tem um buffer limitado que agrupa os eventos por produto
+  (vale o estado mais recente). Se o cliente não acompanhar e o buffer
+  estourar, os eventos são descartados e ele recebe `resync` para recarregar a
+  lista. O envio espera o cliente (backpressure): quem lê devagar recebe menos
+  eventos, não mais memória.
+- Sem eventos, um comentário `: heartbeat` é enviado a cada
+  CHANGE_FEED_HEARTBEAT_SECONDS para manter a conexão e detectar quedas.
+- Toda conexão (inclusive as reconexões automáticas do EventSource, ou após o
+  timeout de leitura do Gateway) começa com `resync`: os eventos publicados
+  enquanto o cliente estava desconectado não são reenviados, então ele
+  recarrega a lista. Os IDs dos eventos valem só para a conexão atual;
+  Last-Event-ID é ignorado.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import OrderedDict, defaultdict
+
+from sqlalchemy import event, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session, object_session
+
+from . import models
+from .lifecycle import get_engine, get_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'product_changes'
+RETRY_MS = 3000  # intervalo de reconexão sugerido ao EventSource
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+_PENDING_KEY = 'product_changes'
+
+
+# --------------------------------------------------------------------------
+# CAPTURA DOS EVENTOS (na transação da escrita)
+# --------------------------------------------------------------------------
+def _emit(connection, session: Session | None, change: dict):
+    if connection.dialect.name == 'postgresql':
+        # NOTIFY é transacional: descartado em rollback, entregue após o commit
+        connection.execute(sql_select(func.pg_notify(CHANNEL, json.dumps(change))))
+    elif session is not None:
+        session.info.setdefault(_PENDING_KEY, []).append(change)
+
+
+def record_stock(session: Session, product_id: int, user_id: int, quantity: int):
+    """Registra uma alteração de estoque feita fora do ORM (UPDATE direto)."""
+    _emit(session.connection(), session, {
+        "type": "stock", "id": product_id, "user_id": user_id, "QT": quantity
+    })
+
+
+def _product_change(change_type: str, product: models.Product) -> dict:
+    return {
+        "type": change_type,
+        "id": product.id,
+        "user_id": product.user_id,
+        "name": product.name,
+        "description": product.description,
+        "price": product.price,
+        "QT": product.QT,
+    }
+
+
+@event.listens_for(models.Product, "after_insert")
+def _after_insert(mapper, connection, target):
+    _emit(connection, object_session(target), _product_change("created", target))
+
+
+@event.listens_for(models.Product, "after_update")
+def _after_update(mapper, connection, target):
+    _emit(connection, object_session(target), _product_change("updated", target))
+
+
+@event.listens_for(models.Product, "after_delete")
+def _after_delete(mapper, connection, target):
+    _emit(connection, object_session(target), {
+        "type": "deleted", "id": target.id, "user_id": target.user_id
+    })
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for change in session.info.pop(_PENDING_KEY, ()):
+        feed.publish(change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+# --------------------------------------------------------------------------
+# DISTRIBUIÇÃO PARA AS CONEXÕES SSE
+# --------------------------------------------------------------------------
+def _coalesce(previous: dict, change: dict) -> dict:
+    merged = {**previous, **change}
+    if change["type"] != "deleted":
+        # created/updated seguidos de baixa de estoque continuam created/updated
+        if previous["type"] == "created" or (previous["type"] == "updated" and change["type"] == "stock"):
+            merged["type"] = previous["type"]
+    return merged
+
+
+class Subscriber:
+    """Buffer de uma conexão SSE. Usado apenas na thread do event loop."""
+
+    def __init__(self, user_id: int, max_pending: int):
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self._pending: OrderedDict[int, dict] = OrderedDict()
+        self._resync = False
+        self._wakeup = asyncio.Event()
+
+    def push(self, change: dict):
+        if change["type"] == "resync":
+            self._resync = True
+        elif not self._resync:
+            previous = self._pending.pop(change["id"], None)
+            self._pending[change["id"]] = _coalesce(previous, change) if previous else change
+            if len(self._pending) > self.max_pending:
+                # Cliente lento: descarta e pede para recarregar a lista
+                self._resync = True
+        if self._resync:
+            self._pending.clear()
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: float) -> list[dict] | None:
+        """Eventos acumulados, ou None se nada chegou dentro do timeout."""
+        if not self._pending and not self._resync:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        self._wakeup.clear()
+
+        if self._resync:
+            self._resync = False
+            return [{"type": "resync"}]
+        changes = list(self._pending.values())
+        self._pending.clear()
+        return changes
+
+
+class ChangeFeed:
+    def __init__(self):
+        self._subscribers: dict[int, set[Subscriber]] = defaultdict(set)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop = threading.Event()
+        self._listener: threading.Thread | None = None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        dialect = get_engine().dialect
+        if dialect.name == 'postgresql' and dialect.driver not in _NOTIFY_READERS:
+            raise RuntimeError(
+                f"Feed de alterações: driver PostgreSQL '{dialect.driver}' não suportado "
+                f"para LISTEN (use {' ou '.join(_NOTIFY_READERS)})"
+            )
+        self._loop = loop
+        self._stop.clear()
+        if dialect.name == 'postgresql':
+            self._listener = threading.Thread(target=self._listen, name='product-changes-listener', daemon=True)
+            self._listener.start()
+
+    def stop(self):
+        self._stop.set()
+        self._loop = None
+
+    def publish(self, change: dict):
+        """Entrega um evento aos assinantes. Pode ser chamado de qualquer thread."""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._dispatch, change)
+
+    def _dispatch(self, change: dict):
+        if change["type"] == "resync":
+            targets = [s for subscribers in self._subscribers.values() for s in subscribers]
+        else:
+            targets = self._subscribers.get(change["user_id"], ())
+        for subscriber in targets:
+            subscriber.push(change)
+
+    def has_capacity(self, user_id: int) -> bool:
+        return len(self._subscribers.get(user_id, ())) < get_settings().CHANGE_FEED_MAX_STREAMS_PER_USER
+
+    def subscribe(self, user_id: int) -> Subscriber | None:
+        """Retorna None se o usuário já tem o máximo de conexões abertas."""
+        settings = get_settings()
+        if len(self._subscribers[user_id]) >= settings.CHANGE_FEED_MAX_STREAMS_PER_USER:
+            return None
+        subscriber = Subscriber(user_id, settings.CHANGE_FEED_MAX_PENDING)
+        self._subscribers[user_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._subscribers.get(subscriber.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.user_id]
+
+    def _listen(self):
+        """Thread: LISTEN numa conexão dedicada (fora do pool), com reconexão."""
+        engine = get_engine()
+        read_notifies = _NOTIFY_READERS[engine.dialect.driver]
+        connected_before = False
+        while not self._stop.is_set():
+            connection = None
+            try:
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                connection = engine.dialect.connect(*cargs, **cparams)
+                connection.autocommit = True
+                connection.cursor().execute(f'LISTEN {CHANNEL}')
+                if connected_before:
+                    # Eventos podem ter se perdido enquanto a conexão estava fora
+                    self.publish({"type": "resync"})
+                connected_before = True
+
+                while not self._stop.is_set():
+                    for payload in read_notifies(connection, 1.0):
+                        self.publish(json.loads(payload))
+            except Exception:
+                logger.exception("Falha no LISTEN de %s; reconectando", CHANNEL)
+                self._stop.wait(1.0)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+def _psycopg2_notifies(connection, timeout: float):
+    if select.select([connection], [], [], timeout) == ([], [], []):
+        return
+    connection.poll()
+    while connection.notifies:
+        yield connection.notifies.pop(0).payload
+
+
+def _psycopg_notifies(connection, timeout: float):
+    # psycopg 3: o gerador termina após `timeout` segundos (requer psycopg >= 3.2)
+    for notify in connection.notifies(timeout=timeout):
+        yield notify.payload
+
+
+# Driver -> leitura das notificações pendentes (espera até `timeout` segundos)
+_NOTIFY_READERS = {'psycopg2': _psycopg2_notifies, 'psycopg': _psycopg_notifies}
+
+
+feed = ChangeFeed()
+
+
+async def stream(user_id: int):
+    """
+    Corpo da resposta SSE. O assinante é registrado aqui, quando o corpo
+    começa a ser enviado, e removido quando o cliente desconecta: uma conexão
+    que cai antes disso não deixa assinante para trás.
+    """
+    subscriber = feed.subscribe(user_id)
+    if subscriber is None:
+        # Limite atingido entre a checagem da rota e o início do corpo:
+        # encerra e deixa o EventSource reconectar
+        yield f"retry: {RETRY_MS}\n\n"
+        return
+
+    heartbeat = get_settings().CHANGE_FEED_HEARTBEAT_SECONDS
+    event_id = 1
+    try:
+        # Eventos de antes desta conexão se perderam: o cliente recarrega a lista
+        yield f"retry: {RETRY_MS}\n\nid: {event_id}\nevent: resync\ndata: {json.dumps({'type': 'resync'})}\n\n"
+        while True:
+            changes = await subscriber.next_batch(heartbeat)
+            if changes is None:
+                yield ": heartbeat\n\n"
+                continue
+
+            chunk = []
+            for change in changes:
+                event_id += 1
+                chunk.append(f"id: {event_id}\nevent: {change['type']}\ndata: {json.dumps(change)}\n\n")
+            yield "".join(chunk)
+    finally:
+        feed.unsubscribe(subscriber)
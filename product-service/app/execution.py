@@ -0,0 +1,136 @@
+# loja/product-service/app/execution.py
+"""
+Execução das rotas síncronas (`def`) no pool de threads do AnyIO.
+
+O FastAPI roda toda rota/dependência `def` num pool de threads cujo limite
+padrão é 40, compartilhado com as sessões bloqueantes do SQLAlchemy. Aqui:
+
+- o limite vem de THREADPOOL_SIZE; sem valor, usa DB_POOL_SIZE + DB_MAX_OVERFLOW,
+  já que threads além das conexões disponíveis só ficariam esperando o pool;
+- InstrumentedRoute mede, por rota, o tempo de espera até a função começar a
+  executar (fila do pool + dependências) e o tempo de execução; os números e o
+  estado do limiter ficam em GET /metrics/threadpool.
+
+Modo híbrido: rotas quentes e curtas podem ser declaradas `async def` para não
+passar pelo pool. Isso só compensa com um driver assíncrono (AsyncEngine do
+SQLAlchemy + asyncpg) para essas rotas; uma rota `async def` que use a Session
+síncrona bloqueia o event loop. Use as métricas abaixo para escolher quais
+rotas migrar: as de maior espera relativa à execução.
+"""
+import asyncio
+import functools
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+import anyio.to_thread
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+
+from .lifecycle import get_settings
+
+_arrival: ContextVar[float] = ContextVar('_arrival', default=0.0)
+
+
+class _RouteStats:
+    __slots__ = ('count', 'wait_total', 'wait_max', 'exec_total', 'exec_max')
+
+    def __init__(self):
+        self.count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.exec_total = 0.0
+        self.exec_max = 0.0
+
+    def observe(self, wait: float, execution: float):
+        self.count += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.exec_total += execution
+        self.exec_max = max(self.exec_max, execution)
+
+    def snapshot(self) -> dict:
+        count = self.count or 1
+        return {
+            "count": self.count,
+            "wait_avg_ms": round(self.wait_total / count * 1000, 3),
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "exec_avg_ms": round(self.exec_total / count * 1000, 3),
+            "exec_max_ms": round(self.exec_max * 1000, 3),
+        }
+
+
+route_stats: dict[str, _RouteStats] = defaultdict(_RouteStats)
+
+
+def threadpool_size() -> int:
+    settings = get_settings()
+    return settings.THREADPOOL_SIZE or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+
+# O limiter do AnyIO é global no processo. No monolito (monolith/) vários
+# serviços o compartilham, e quem o dimensiona é o processo hospedeiro, com a
+# soma dos serviços; ele desliga este ajuste antes dos lifespans.
+configure_limiter = True
+
+
+def configure_threadpool():
+    """Ajusta o limiter do AnyIO. Deve ser chamada dentro do event loop (lifespan)."""
+    if configure_limiter:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool_size()
+
+
+def _timed(func, route_key: str):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            arrival = _arrival.get() or started
+            route_stats[route_key].observe(started - arrival, finished - started)
+
+    wrapper.timed = True
+    return wrapper
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    APIRoute que mede espera vs. execução das rotas síncronas. A medição da
+    execução envolve o endpoint antes de ele ser entregue ao APIRoute (o
+    FastAPI lê a assinatura pelo __wrapped__); a chegada é marcada no handler.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router recria as rotas com o mesmo endpoint: envolve só uma vez
+        if not asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, 'timed', False):
+            methods = kwargs.get('methods') or ['GET']
+            route_key = f"{','.join(sorted(method.upper() for method in methods))} {path}"
+            endpoint = _timed(endpoint, route_key)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def instrumented_handler(request):
+            _arrival.set(time.perf_counter())
+            return await handler(request)
+
+        return instrumented_handler
+
+
+router = APIRouter(prefix='/metrics', tags=['metrics'])
+
+
+@router.get('/threadpool')
+async def read_threadpool_metrics():
+    # async def: responde mesmo com o pool saturado
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    stats = limiter.statistics()
+    return {
+        "total_tokens": limiter.total_tokens,
+        "borrowed_tokens": stats.borrowed_tokens,
+        "tasks_waiting": stats.tasks_waiting,
+        "routes": {key: value.snapshot() for key, value in route_stats.items()},
+    }
@@ -0,0 +1,259 @@
+# loja/product-service/app/idempotency.py
+"""
+Suporte ao cabeçalho Idempotency-Key para rotas POST.
+
+A primeira requisição com uma chave "reserva" a chave no banco
+(tabela idempotency_keys, status 'processing'), executa a rota e grava a
+resposta com um TTL. Repetições com a mesma chave recebem a resposta gravada
+sem executar a rota de novo; uma repetição que chega enquanto a original
+ainda está em andamento espera por ela (evento local no mesmo processo,
+polling no banco entre processos).
+
+A reserva ('processing') tem uma concessão curta (PROCESSING_LEASE), renovada
+a cada LEASE_RENEW_INTERVAL enquanto a rota executa: se o processo morrer antes
+de gravar ou liberar a chave, uma repetição posterior assume a chave quando a
+concessão vence, em vez de receber 409 até o TTL.
+
+A chave é escopada por usuário (X-User-ID), método e caminho. Reusar a chave
+com outro corpo retorna 422. Respostas 5xx não são gravadas: a chave é
+liberada e o cliente pode tentar de novo.
+
+Cópia idêntica em sales-service e product-service (só o cabeçalho muda);
+verifique com `python tools/check_shared_modules.py`.
+"""
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from . import DB, models
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL = timedelta(hours=24)
+WAIT_TIMEOUT = 30.0  # segundos esperando a requisição original terminar
+# Validade da reserva 'processing': 2× o tempo máximo que uma repetição espera pela original
+PROCESSING_LEASE = timedelta(seconds=2 * WAIT_TIMEOUT)
+LEASE_RENEW_INTERVAL = PROCESSING_LEASE.total_seconds() / 3
+POLL_INTERVAL = 0.05
+PURGE_EVERY = 500  # remove chaves expiradas a cada N chaves novas
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devolve datetimes sem fuso mesmo em colunas timezone=True
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _lease_expired(row, now: datetime) -> bool:
+    return (row.status == 'processing' and row.lease_expires_at is not None
+            and _as_utc(row.lease_expires_at) <= now)
+
+
+def _claim(scope_key: str, fingerprint: str):
+    """
+    Tenta reservar a chave. Retorna None se a reserva foi feita (esta
+    requisição executa a rota) ou a linha existente, desanexada da sessão.
+    """
+    now = datetime.now(timezone.utc)
+    with Session(DB.get_engine(), expire_on_commit=False) as session:
+        while True:
+            session.add(models.IdempotencyKey(
+                key=scope_key,
+                fingerprint=fingerprint,
+                expires_at=now + IDEMPOTENCY_TTL,
+                lease_expires_at=now + PROCESSING_LEASE,
+            ))
+            try:
+                session.commit()
+                return None
+            except IntegrityError:
+                session.rollback()
+
+            existing = session.get(models.IdempotencyKey, scope_key)
+            if existing is None:
+                continue  # Liberada entre o INSERT e o SELECT
+            if _as_utc(existing.expires_at) > now and not _lease_expired(existing, now):
+                session.expunge(existing)
+                return existing
+
+            # Chave expirada ou reserva abandonada: descarta (se ninguém a
+            # assumiu nesse meio-tempo) e tenta reservar de novo
+            session.execute(delete(models.IdempotencyKey).where(
+                models.IdempotencyKey.key == scope_key,
+                or_(
+                    models.IdempotencyKey.expires_at <= now,
+                    (models.IdempotencyKey.status == 'processing')
+                    & (models.IdempotencyKey.lease_expires_at <= now),
+                ),
+            ))
+            session.commit()
+            session.expunge_all()
+
+
+def _load(scope_key: str):
+    with Session(DB.get_engine(), expire_on_commit=False) as session:
+        row = session.get(models.IdempotencyKey, scope_key)
+        if row is not None:
+            session.expunge(row)
+        return row
+
+
+def _complete(scope_key: str, status_code: int, body: bytes, content_type: str | None):
+    with Session(DB.get_engine()) as session:
+        row = session.get(models.IdempotencyKey, scope_key)
+        if row is None:
+            return
+        row.status = 'completed'
+        row.lease_expires_at = None
+        row.response_status = status_code
+        row.response_body = body
+        row.response_content_type = content_type
+        session.commit()
+
+
+def _renew_lease(scope_key: str):
+    with Session(DB.get_engine()) as session:
+        session.execute(update(models.IdempotencyKey).where(
+            models.IdempotencyKey.key == scope_key,
+            models.IdempotencyKey.status == 'processing',
+        ).values(lease_expires_at=datetime.now(timezone.utc) + PROCESSING_LEASE))
+        session.commit()
+
+
+def _release(scope_key: str):
+    with Session(DB.get_engine()) as session:
+        session.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.key == scope_key))
+        session.commit()
+
+
+def purge_expired():
+    """Remove as chaves cujo TTL já passou."""
+    with Session(DB.get_engine()) as session:
+        session.execute(delete(models.IdempotencyKey).where(
+            models.IdempotencyKey.expires_at < datetime.now(timezone.utc)
+        ))
+        session.commit()
+
+
+def _replay(row) -> Response:
+    return Response(
+        content=row.response_body,
+        status_code=row.response_status,
+        media_type=row.response_content_type,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, paths: set[str]):
+        super().__init__(app)
+        self.paths = paths
+        self._inflight: dict[str, asyncio.Event] = {}
+        self._claims = 0
+
+    async def dispatch(self, request: Request, call_next):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or request.method != "POST" or request.url.path not in self.paths:
+            return await call_next(request)
+
+        user_id = request.headers.get("X-User-ID", "")
+        scope_key = f"{user_id}:{request.method}:{request.url.path}:{key}"[:255]
+        body = await request.body()
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + WAIT_TIMEOUT
+        while True:
+            local = self._inflight.get(scope_key)
+            if local is not None:
+                # Original em andamento neste processo: espera sem consultar o banco
+                try:
+                    await asyncio.wait_for(local.wait(), timeout=max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    return self._still_running()
+
+            existing = await run_in_threadpool(_claim, scope_key, fingerprint)
+            if existing is None:
+                return await self._execute(request, call_next, scope_key)
+
+            if existing.fingerprint != fingerprint:
+                return JSONResponse(
+                    status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                    content={"detail": "Idempotency-Key already used with a different request body"},
+                )
+            if existing.status == 'completed':
+                return _replay(existing)
+
+            # Original em andamento em outro processo: polling até concluir,
+            # liberar a chave ou a reserva vencer
+            while loop.time() < deadline:
+                await asyncio.sleep(POLL_INTERVAL)
+                existing = await run_in_threadpool(_load, scope_key)
+                if (existing is None or existing.status == 'completed'
+                        or _lease_expired(existing, datetime.now(timezone.utc))):
+                    break
+            else:
+                return self._still_running()
+
+            if existing is not None and existing.status == 'completed':
+                return _replay(existing)
+            # A original falhou e liberou a chave, ou abandonou a reserva: tenta executar esta
+
+    @staticmethod
+    async def _keep_lease(scope_key: str):
+        """Renova a reserva enquanto a rota executa (cancelada ao terminar)."""
+        while True:
+            await asyncio.sleep(LEASE_RENEW_INTERVAL)
+            try:
+                await run_in_threadpool(_renew_lease, scope_key)
+            except Exception:
+                logger.warning("Falha ao renovar a reserva da chave %s", scope_key, exc_info=True)
+
+    async def _execute(self, request: Request, call_next, scope_key: str) -> Response:
+        event = asyncio.Event()
+        self._inflight[scope_key] = event
+        renewal = asyncio.create_task(self._keep_lease(scope_key))
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+
+            if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                await run_in_threadpool(_release, scope_key)
+            else:
+                await run_in_threadpool(
+                    _complete, scope_key, response.status_code, body,
+                    response.headers.get("content-type")
+                )
+                self._claims += 1
+                if self._claims % PURGE_EVERY == 0:
+                    await run_in_threadpool(purge_expired)
+
+            return Response(
+                content=body,
+                status_code=response.status_code,
+                headers=dict(response.headers),
+            )
+        except Exception:
+            await run_in_threadpool(_release, scope_key)
+            raise
+        finally:
+            renewal.cancel()
+            event.set()
+            self._inflight.pop(scope_key, None)
+
+    @staticmethod
+    def _still_running() -> Response:
+        return JSONResponse(
+            status_code=HTTPStatus.CONFLICT,
+            content={"detail": "A request with this Idempotency-Key is still in progress"},
+        )
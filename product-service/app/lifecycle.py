@@ -0,0 +1,143 @@
+# loja/product-service/app/lifecycle.py
+"""
+Ciclo de vida do processo: configuração, engines do banco e prontidão.
+
+- Settings() é criado uma única vez, sob demanda (get_settings).
+- As engines são criadas no primeiro uso, ou seja, dentro do worker do
+  gunicorn e não no master. Com `--preload` o master importa o app, mas se
+  alguma engine já tiver sido criada, o pool herdado é descartado no filho
+  (os.register_at_fork + dispose(close=False)) sem fechar as conexões do pai.
+- O lifespan aquece o pool e o catálogo do schema antes de o worker ser
+  marcado como pronto; /health/ready responde 503 até lá.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from http import HTTPStatus
+
+from fastapi import APIRouter, FastAPI, Response
+from sqlalchemy import create_engine, make_url, select, text
+from sqlalchemy.orm import configure_mappers
+
+from .settings import Settings
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
+
+
+class _State:
+    engine = None
+    replica_engines = None
+    ready = False
+    started_at = time.monotonic()
+    ready_after: float | None = None
+
+
+_state = _State()
+
+
+def _create_engine(url: str, **kwargs):
+    settings = get_settings()
+    return create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        **kwargs
+    )
+
+
+def _replica_connect_args(url: str) -> dict:
+    # Réplica inacessível não pode prender a requisição até o timeout do TCP
+    if make_url(url).get_backend_name() == 'postgresql':
+        return {'connect_timeout': get_settings().REPLICA_CONNECT_TIMEOUT}
+    return {}
+
+
+def get_engine():
+    if _state.engine is None:
+        _state.engine = _create_engine(get_settings().DATABASE_URL)
+    return _state.engine
+
+
+def get_replica_engines() -> list:
+    if _state.replica_engines is None:
+        _state.replica_engines = [
+            _create_engine(url, connect_args=_replica_connect_args(url))
+            for url in get_settings().DATABASE_REPLICA_URLS
+        ]
+    return _state.replica_engines
+
+
+def _dispose_after_fork():
+    # Conexões herdadas do processo pai não podem ser usadas pelo filho
+    for engine in [_state.engine, *(_state.replica_engines or [])]:
+        if engine is not None:
+            engine.dispose(close=False)
+    _state.ready = False
+    _state.started_at = time.monotonic()
+
+
+os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
+def warm_up():
+    """Abre as conexões do pool e consulta cada tabela mapeada (sem ler linhas)."""
+    from . import models
+
+    configure_mappers()
+    settings = get_settings()
+    engine = get_engine()
+
+    connections = [engine.connect() for _ in range(min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE))]
+    try:
+        if connections:
+            for table in models.table_registry.metadata.sorted_tables:
+                connections[0].execute(select(text('1')).select_from(table).limit(0))
+        for conn in connections[1:]:
+            conn.execute(text('SELECT 1'))
+    finally:
+        for conn in connections:
+            conn.close()
+
+    for replica in get_replica_engines():
+        try:
+            with replica.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except Exception:
+            pass  # Réplica fora do ar: as leituras caem para o primário (app/DB.py)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from .execution import configure_threadpool
+
+    configure_threadpool()
+    await asyncio.to_thread(warm_up)
+    _state.ready = True
+    _state.ready_after = time.monotonic() - _state.started_at
+    yield
+    _state.ready = False
+    for engine in [_state.engine, *(_state.replica_engines or [])]:
+        if engine is not None:
+            engine.dispose()
+
+
+router = APIRouter(prefix='/health', tags=['health'])
+
+
+@router.get('/live')
+def liveness():
+    return {"status": "alive"}
+
+
+@router.get('/ready')
+def readiness(response: Response):
+    if not _state.ready:
+        response.status_code = HTTPStatus.SERVICE_UNAVAILABLE
+        return {"status": "starting"}
+    return {"status": "ready", "startup_seconds": round(_state.ready_after, 3)}
@@ -1,20 +1,58 @@
 # loja/product-service/app/main.py
+import asyncio
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 from typing import Annotated, List
 
 from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Header # NOVO: Importa Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from . import DB, models, schemas
+from . import DB, changes, execution, lifecycle, models, profiling, schemas, serialization, stock
+from .compression import CompressionMiddleware
+from .idempotency import IdempotencyMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Aquece o pool antes de ficar pronto; depois liga o feed de alterações
+    async with lifecycle.lifespan(app):
+        changes.feed.start(asyncio.get_running_loop())
+        yield
+        changes.feed.stop()
+
 
 app = FastAPI(
     title='Microserviço de Produtos',
     description='API para gerenciar o catálogo de produtos.',
-    version='1.0.0'
+    version='1.0.0',
+    lifespan=lifespan
+)
+app.include_router(lifecycle.router)
+app.include_router(execution.router)
+
+# POST /products/ aceita o cabeçalho Idempotency-Key (retentativas seguras)
+app.add_middleware(IdempotencyMiddleware, paths={'/products/'})
+# Compressão negociada (gzip/br/zstd) para o Gateway e chamadas entre serviços
+app.add_middleware(CompressionMiddleware, minimum_size=lifecycle.get_settings().COMPRESSION_MIN_SIZE)
+# X-Last-Write nas respostas de escritas (read-your-writes entre workers; app/DB.py)
+app.add_middleware(DB.WriteMarkerMiddleware)
+
+# Profiling sob demanda (cabeçalho X-Profile ou amostragem); envolve os demais middlewares
+profiling.configure(
+    'product-service',
+    token=lifecycle.get_settings().PROFILING_TOKEN,
+    sample_rate=lifecycle.get_settings().PROFILING_SAMPLE_RATE,
+    directory=lifecycle.get_settings().PROFILING_DIR,
+    max_artifacts=lifecycle.get_settings().PROFILING_MAX_ARTIFACTS
 )
+app.add_middleware(profiling.ProfilingMiddleware)
+app.include_router(profiling.router)
 
 T_Session = Annotated[Session, Depends(DB.get_session)]
+# Sessão para rotas somente-leitura (réplica, quando configurada)
+T_ReadSession = Annotated[Session, Depends(DB.get_read_session)]
 
 # --- INTEGRAÇÃO COM GATEWAY (AUTENTICAÇÃO SIMPLIFICADA) ---
 def get_current_user_from_header(x_user_id: Annotated[int, Header(convert_underscores=True)]):
@@ -31,7 +69,17 @@ def get_current_user_from_header(x_user_id: Annotated[int, Header(convert_unders
 T_CurrentUser = Annotated[dict, Depends(get_current_user_from_header)]
 # --------------------------------------------------------------------------
 
-router = APIRouter(prefix='/products', tags=['products'])
+router = APIRouter(prefix='/products', tags=['products'], route_class=execution.InstrumentedRoute)
+
+# Colunas expostas por ProductPublic, na ordem de serialization.PRODUCT_FIELDS.
+# As rotas de leitura selecionam só elas e respondem bytes JSON (app/serialization.py).
+PRODUCT_COLUMNS = (
+    models.Product.id,
+    models.Product.name,
+    models.Product.price,
+    models.Product.QT,
+    models.Product.user_id,
+)
 
 # ... (Rotas create_product, read_products, get_product_by_id, update_product, delete_product) ...
 
@@ -55,46 +103,154 @@ def create_product(
     return db_product
 
 
+@router.post('/stock-movements', response_model=schemas.StockMovementResult)
+def apply_stock_movements(
+        batch: schemas.StockMovementBatch, session: T_Session, current_user: T_CurrentUser
+):
+    """
+    Aplica em lote as baixas de estoque enviadas pelo outbox do Sales-service.
+    Cada movimento é aplicado no máximo uma vez (deduplicado pelo movement_id)
+    com UPDATEs atômicos que não deixam o estoque ficar negativo.
+    """
+    result = schemas.StockMovementResult(applied=[], duplicates=[], rejected=[])
+
+    movement_ids = [m.movement_id for m in batch.movements]
+    already_applied = set(session.scalars(
+        select(models.AppliedStockMovement.movement_id).where(
+            models.AppliedStockMovement.movement_id.in_(movement_ids)
+        )
+    ))
+
+    new_movements = []
+    for movement in batch.movements:
+        if movement.movement_id in already_applied:
+            result.duplicates.append(movement.movement_id)
+        else:
+            already_applied.add(movement.movement_id)
+            new_movements.append(movement)
+
+    # Movimentos do mesmo produto são somados num único UPDATE (ver app/stock.py)
+    result.applied, result.rejected = stock.apply_movements(
+        session, current_user["id"], new_movements
+    )
+
+    products_by_movement = {m.movement_id: m.product_id for m in new_movements}
+    for movement_id in result.applied:
+        session.add(models.AppliedStockMovement(
+            movement_id=movement_id,
+            product_id=products_by_movement[movement_id]
+        ))
+
+    session.commit()
+    return result
+
+
+@router.post('/{product_id}/stock/decrement', response_model=schemas.StockLevel)
+async def decrement_product_stock(
+        product_id: int,
+        decrement: schemas.StockDecrementSchema,
+        current_user: T_CurrentUser
+):
+    """
+    Dá baixa no estoque de forma atômica, com confirmação imediata (vendas
+    fora do Sales-service, ex.: balcão, via Gateway; substitui o PUT com o
+    novo `QT`, que perdia atualizações). O checkout do Sales-service usa o
+    outbox (/stock-movements). Baixas simultâneas do mesmo produto neste
+    processo são agrupadas num único UPDATE (produtos quentes); a espera
+    acontece no event loop, sem ocupar o threadpool.
+    """
+    remaining = await stock.stock_batcher.decrement(product_id, current_user["id"], decrement.QT)
+    if remaining is None:
+        exists = await run_in_threadpool(stock.product_exists, product_id, current_user["id"])
+        if not exists:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND,
+                detail='Product not found',
+            )
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Insufficient stock',
+        )
+    DB.mark_request_write(current_user["id"])
+    return schemas.StockLevel(id=product_id, QT=remaining)
+
+
 @router.get('/', response_model=schemas.ProductListResponse)
 def read_products(
-        session: T_Session,
+        session: T_ReadSession,
         current_user: T_CurrentUser,
         skip: int = 0,
         limit: int = 100,
         name: str | None = Query(None),
-        product_id: int | None = Query(None)
+        product_id: int | None = Query(None),
+        ids: list[int] | None = Query(None),  # busca em lote: ?ids=1&ids=2
+        accept: Annotated[str | None, Header()] = None  # application/msgpack para serviços internos
 ):
-    query = select(models.Product).where(models.Product.user_id == current_user["id"])
+    filters = [models.Product.user_id == current_user["id"]]
     if name:
-        query = query.where(models.Product.name.contains(name))
+        filters.append(models.Product.name.contains(name))
     if product_id:
-        query = query.where(models.Product.id == product_id)
+        filters.append(models.Product.id == product_id)
+    if ids:
+        filters.append(models.Product.id.in_(ids))
 
-    total_count = session.scalar(select(func.count()).select_from(query.subquery()))
-    products = session.scalars(query.offset(skip).limit(limit)).all()
+    # O total vem na mesma consulta (função de janela, calculada antes do LIMIT)
+    rows = session.execute(
+        select(*PRODUCT_COLUMNS, func.count().over().label('total_count'))
+        .where(*filters)
+        .offset(skip)
+        .limit(limit)
+    ).all()
 
-    if not products and total_count == 0:
-        return schemas.ProductListResponse(products=[], total_count=0)
+    if rows:
+        total_count = rows[0].total_count
+    elif skip:
+        # Página além do fim: a janela não trouxe linhas, conta à parte
+        total_count = session.scalar(select(func.count(models.Product.id)).where(*filters))
+    else:
+        total_count = 0
 
-    return schemas.ProductListResponse(products=products, total_count=total_count)
+    return serialization.product_list_response(rows, total_count, accept)
+
+
+# Declarada antes de /{product_id} para não ser capturada por ela
+@router.get('/changes')
+async def product_changes(current_user: T_CurrentUser):
+    """
+    Server-Sent Events com as alterações de produtos e estoque do usuário
+    (ver app/changes.py). Substitui o polling de GET /products/.
+    """
+    if not changes.feed.has_capacity(current_user["id"]):
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Too many open change streams',
+        )
+    return StreamingResponse(
+        changes.stream(current_user["id"]),
+        media_type='text/event-stream',
+        headers=changes.SSE_HEADERS
+    )
 
 
 @router.get('/{product_id}', response_model=schemas.ProductPublic)
 def get_product_by_id(
-    product_id: int, session: T_Session, current_user: T_CurrentUser
+    product_id: int,
+    session: T_ReadSession,
+    current_user: T_CurrentUser,
+    accept: Annotated[str | None, Header()] = None  # application/msgpack para serviços internos
 ):
-    db_product = session.scalar(
-        select(models.Product).where(
+    row = session.execute(
+        select(*PRODUCT_COLUMNS).where(
             models.Product.id == product_id,
             models.Product.user_id == current_user["id"]
         )
-    )
-    if not db_product:
+    ).first()
+    if row is None:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail='Product not found',
         )
-    return db_product
+    return serialization.product_response(row, accept)
 
 
 @router.put('/{product_id}', response_model=schemas.ProductPublic)
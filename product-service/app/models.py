@@ -1,5 +1,7 @@
 # product-service/app/models.py
+from datetime import datetime
 from sqlalchemy.orm import Mapped, registry, mapped_column
+from sqlalchemy import DateTime, LargeBinary, String, func
 
 table_registry = registry()
 
@@ -13,4 +15,35 @@ class Product:
     name: Mapped[str]
     description: Mapped[str | None]
     price: Mapped[float]
-    QT: Mapped[int] = mapped_column(name='qt')
\ No newline at end of file
+    QT: Mapped[int] = mapped_column(name='qt')
+
+
+@table_registry.mapped_as_dataclass
+class AppliedStockMovement:
+    """Registro das baixas de estoque já aplicadas, para deduplicar reenvios do outbox de vendas."""
+    __tablename__ = 'applied_stock_movements'
+
+    movement_id: Mapped[int] = mapped_column(primary_key=True)  # ID em stock_movements (Sales-service)
+    product_id: Mapped[int]
+    applied_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+
+
+@table_registry.mapped_as_dataclass
+class IdempotencyKey:
+    """Chaves Idempotency-Key e respostas gravadas (ver app/idempotency.py)."""
+    __tablename__ = 'idempotency_keys'
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)  # usuário:método:caminho:chave
+    fingerprint: Mapped[str]  # sha256 do corpo da requisição
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    status: Mapped[str] = mapped_column(default='processing')  # processing | completed
+    # Fim da reserva 'processing' (ver PROCESSING_LEASE em app/idempotency.py)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), default=None)
+    response_status: Mapped[int | None] = mapped_column(default=None)
+    response_body: Mapped[bytes | None] = mapped_column(LargeBinary, default=None)
+    response_content_type: Mapped[str | None] = mapped_column(default=None)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
@@ -0,0 +1,389 @@
+# loja/product-service/app/profiling.py
+"""
+Profiling sob demanda, por requisição.
+
+Uma requisição é perfilada quando traz o cabeçalho `X-Profile` com o token
+configurado (PROFILING_TOKEN) ou quando é sorteada (PROFILING_SAMPLE_RATE).
+Para ela são registrados:
+
+- um perfil de CPU por amostragem: pyinstrument, se instalado (HTML); senão um
+  amostrador em Python puro que grava as pilhas no formato "folded" (uma pilha
+  e a contagem por linha, aceito por flamegraph.pl/speedscope). O amostrador
+  lê a thread do event loop e as threads que estiverem executando código do
+  serviço, então requisições simultâneas podem aparecer no mesmo perfil. Ele
+  só roda para requisições com X-Profile e no máximo um por processo; a
+  amostragem (PROFILING_SAMPLE_RATE) sem pyinstrument registra apenas SQL e
+  HTTP. No monolito, a chamada em processo a outro serviço já está dentro do
+  perfil do Gateway e não abre um segundo;
+- as instruções SQL com duração e linhas afetadas (eventos do SQLAlchemy,
+  quando o serviço usa banco);
+- as chamadas HTTP para outros serviços (event hooks do httpx). O cabeçalho
+  de profiling é repassado, e o serviço chamado grava o próprio artefato com
+  o mesmo X-Profile-Id;
+- padrões N+1: a mesma instrução SQL, ou a mesma rota HTTP com IDs
+  diferentes, repetida N_PLUS_ONE_THRESHOLD vezes ou mais.
+
+Os artefatos ficam em PROFILING_DIR/<id>/ (report.json e o perfil), com no
+máximo `max_artifacts` requisições guardadas. A resposta perfilada traz
+`X-Profile-Id`, e os artefatos são baixados em /profiles/<id> com o mesmo
+cabeçalho X-Profile.
+"""
+import asyncio
+import contextvars
+import hmac
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from http import HTTPStatus
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # Dependência opcional
+    Profiler = None
+
+try:
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+except ImportError:  # Serviço sem banco (Gateway)
+    Engine = None
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+N_PLUS_ONE_THRESHOLD = 3
+MAX_RECORDED_CALLS = 1000  # por requisição, para limitar a memória
+SAMPLE_INTERVAL = 0.001  # segundos
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+class _Config:
+    service = "service"
+    token: str | None = None
+    sample_rate = 0.0
+    directory = Path("profiles")
+    max_artifacts = 200
+
+
+config = _Config()
+
+
+def configure(
+        service: str,
+        token: str | None = None,
+        sample_rate: float = 0.0,
+        directory: str = "profiles",
+        max_artifacts: int = 200
+):
+    config.service = service
+    config.token = token or None
+    config.sample_rate = sample_rate
+    config.directory = Path(directory)
+    config.max_artifacts = max_artifacts
+
+
+def _token_matches(value: str | bytes | None) -> bool:
+    if not config.token or not value:
+        return False
+    if isinstance(value, str):
+        value = value.encode("latin-1")  # cabeçalhos chegam decodificados como latin-1
+    # Compara bytes: compare_digest rejeita str com caracteres não ASCII
+    return hmac.compare_digest(value, config.token.encode())
+
+
+# --------------------------------------------------------------------------
+# AMOSTRADOR DE PILHAS (sem pyinstrument)
+# --------------------------------------------------------------------------
+SAMPLER_THREAD_NAME = "profiling-sampler"
+_sampler_lock = threading.Lock()
+
+
+class StackSampler:
+    def __init__(self, loop_thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self._loop_thread_id = loop_thread_id
+        self._interval = interval
+        self._stacks: dict[str, int] = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=SAMPLER_THREAD_NAME, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        lines = sorted(self._stacks.items(), key=lambda item: item[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in lines)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack, in_app = [], False
+                while frame is not None:
+                    code = frame.f_code
+                    in_app = in_app or code.co_filename.startswith(_APP_DIR)
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if thread_id == self._loop_thread_id or in_app:
+                    self._stacks[";".join(reversed(stack))] += 1
+            time.sleep(self._interval)
+
+
+# --------------------------------------------------------------------------
+# REGISTRO DA REQUISIÇÃO
+# --------------------------------------------------------------------------
+class RequestProfile:
+    def __init__(self, profile_id: str, method: str, path: str, trigger: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.end: float | None = None
+        self.status: int | None = None
+        self.sql: list[dict] = []
+        self.http: list[dict] = []
+
+    def add_sql(self, statement: str, duration: float, rowcount: int):
+        if len(self.sql) < MAX_RECORDED_CALLS:
+            self.sql.append({"statement": statement, "duration_ms": round(duration * 1000, 3), "rowcount": rowcount})
+
+    def add_http(self, method: str, url: str, status: int | None, duration: float):
+        if len(self.http) < MAX_RECORDED_CALLS:
+            self.http.append({"method": method, "url": url, "status": status, "duration_ms": round(duration * 1000, 3)})
+
+    def n_plus_one(self) -> list[dict]:
+        groups = defaultdict(list)
+        for call in self.sql:
+            groups[("sql", call["statement"])].append(call["duration_ms"])
+        for call in self.http:
+            path = _NUMERIC_SEGMENT.sub("/{id}", call["url"].split("?")[0])
+            groups[("http", f"{call['method']} {path}")].append(call["duration_ms"])
+
+        return [
+            {"kind": kind, "pattern": pattern, "count": len(durations), "total_ms": round(sum(durations), 3)}
+            for (kind, pattern), durations in groups.items()
+            if len(durations) >= N_PLUS_ONE_THRESHOLD
+        ]
+
+    def report(self, profile_file: str | None) -> dict:
+        return {
+            "id": self.id,
+            "service": config.service,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(((self.end or time.perf_counter()) - self.start) * 1000, 3),
+            "sql": {
+                "count": len(self.sql),
+                "total_ms": round(sum(c["duration_ms"] for c in self.sql), 3),
+                "statements": self.sql,
+            },
+            "http": {
+                "count": len(self.http),
+                "total_ms": round(sum(c["duration_ms"] for c in self.http), 3),
+                "calls": self.http,
+            },
+            "n_plus_one": self.n_plus_one(),
+            "profile": profile_file,
+        }
+
+
+_current: contextvars.ContextVar[RequestProfile | None] = contextvars.ContextVar("request_profile", default=None)
+
+
+# --------------------------------------------------------------------------
+# SQL (SQLAlchemy) E HTTP (httpx)
+# --------------------------------------------------------------------------
+if Engine is not None:
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        starts = conn.info.get("profiling_start")
+        if profile is not None and starts:
+            profile.add_sql(statement, time.perf_counter() - starts.pop(), cursor.rowcount)
+
+
+async def _on_request(request):
+    profile = _current.get()
+    if profile is not None:
+        request.extensions["profiling_start"] = time.perf_counter()
+        # O serviço chamado grava o próprio artefato com o mesmo ID
+        if config.token:
+            request.headers[PROFILE_HEADER] = config.token
+            request.headers[PROFILE_ID_HEADER] = profile.id
+
+
+async def _on_response(response):
+    profile = _current.get()
+    start = response.request.extensions.get("profiling_start")
+    if profile is not None and start is not None:
+        profile.add_http(response.request.method, str(response.request.url), response.status_code,
+                         time.perf_counter() - start)
+
+
+# Para httpx.AsyncClient(event_hooks=HTTPX_EVENT_HOOKS)
+HTTPX_EVENT_HOOKS = {"request": [_on_request], "response": [_on_response]}
+
+
+# --------------------------------------------------------------------------
+# MIDDLEWARE E ARTEFATOS
+# --------------------------------------------------------------------------
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (config.token or config.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if _token_matches(headers.get(PROFILE_HEADER.lower().encode())):
+            trigger = "header"
+            requested_id = headers.get(PROFILE_ID_HEADER.lower().encode(), b"").decode("latin-1")
+        elif config.sample_rate and random.random() < config.sample_rate:
+            trigger, requested_id = "sample", ""
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = requested_id if _ID_PATTERN.match(requested_id) else uuid.uuid4().hex
+        profile = RequestProfile(profile_id, scope["method"], scope["path"], trigger)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message = {**message, "headers": [
+                    *message.get("headers", []), (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())
+                ]}
+            await send(message)
+
+        token = _current.set(profile)
+        profiler = None
+        try:
+            profiler = _start_cpu_profiler(trigger)
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.end = time.perf_counter()
+            _current.reset(token)
+            profile_file, profile_data = _stop_cpu_profiler(profiler)
+            await asyncio.to_thread(_save, profile, profile_file, profile_data)
+
+
+def _start_cpu_profiler(trigger: str):
+    """Inicia o perfil de CPU da requisição; None quando não há um a abrir."""
+    if Profiler is not None:
+        profiler = Profiler(interval=SAMPLE_INTERVAL, async_mode="enabled")
+        try:
+            profiler.start()
+        except RuntimeError:
+            # Já há um profiler neste contexto async (monolito: o do Gateway)
+            return None
+        return profiler
+
+    if trigger != "header":
+        return None
+    with _sampler_lock:
+        # Um amostrador por processo (no monolito, entre as cópias deste módulo)
+        if any(thread.name == SAMPLER_THREAD_NAME for thread in threading.enumerate()):
+            return None
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+    return sampler
+
+
+def _stop_cpu_profiler(profiler) -> tuple[str | None, str | None]:
+    if profiler is None:
+        return None, None
+    if isinstance(profiler, StackSampler):
+        return "profile.folded.txt", profiler.stop()
+    profiler.stop()
+    return "profile.html", profiler.output_html()
+
+
+def _save(profile: RequestProfile, profile_file: str | None, profile_data: str | None):
+    # No monolito o mesmo ID chega a vários serviços: um subdiretório por serviço
+    directory = config.directory / profile.id / config.service
+    directory.mkdir(parents=True, exist_ok=True)
+    if profile_file is not None:
+        (directory / profile_file).write_text(profile_data)
+    (directory / "report.json").write_text(json.dumps(profile.report(profile_file), indent=2))
+    _prune()
+
+
+def _prune():
+    artifacts = sorted(
+        (path for path in config.directory.iterdir() if path.is_dir()),
+        key=lambda path: path.stat().st_mtime
+    )
+    for path in artifacts[:max(len(artifacts) - config.max_artifacts, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _require_token(x_profile: str | None = Header(None)):
+    # Sem token configurado (ou inválido) os artefatos não existem para o cliente
+    if not _token_matches(x_profile):
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Not Found")
+
+
+def _artifact_dir(profile_id: str) -> Path:
+    directory = config.directory / profile_id / config.service
+    if not _ID_PATTERN.match(profile_id) or not directory.is_dir():
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Profile not found")
+    return directory
+
+
+router = APIRouter(prefix="/profiles", tags=["profiling"], dependencies=[Depends(_require_token)])
+
+
+@router.get("/")
+def list_profiles(limit: int = 50):
+    reports = sorted(config.directory.glob(f"*/{config.service}/report.json"),
+                     key=lambda path: path.stat().st_mtime, reverse=True)
+    summaries = []
+    for path in reports[:limit]:
+        report = json.loads(path.read_text())
+        summaries.append({
+            key: report[key] for key in ("id", "method", "path", "status", "trigger", "started_at", "duration_ms")
+        } | {"n_plus_one": len(report["n_plus_one"])})
+    return {"profiles": summaries}
+
+
+@router.get("/{profile_id}")
+def read_profile(profile_id: str):
+    return json.loads((_artifact_dir(profile_id) / "report.json").read_text())
+
+
+@router.get("/{profile_id}/profile")
+def download_profile(profile_id: str):
+    directory = _artifact_dir(profile_id)
+    report = json.loads((directory / "report.json").read_text())
+    if report["profile"] is None:
+        # Sem perfil de CPU (amostragem sem pyinstrument, ou coberto pelo perfil do Gateway)
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="No CPU profile for this request")
+    return FileResponse(directory / report["profile"], filename=f"{profile_id}-{report['profile']}")
@@ -28,4 +28,29 @@ class ProductUpdateSchema(BaseModel):
 
 class ProductListResponse(BaseModel):
     products: list[ProductPublic]
-    total_count: int
\ No newline at end of file
+    total_count: int
+
+class StockMovementSchema(BaseModel):
+    movement_id: int
+    product_id: int
+    QT: int = Field(..., gt=0)
+
+
+class StockMovementBatch(BaseModel):
+    movements: list[StockMovementSchema]
+
+
+class StockMovementResult(BaseModel):
+    applied: list[int]
+    duplicates: list[int]
+    rejected: list[int]
+
+
+
+class StockDecrementSchema(BaseModel):
+    QT: int = Field(..., gt=0)
+
+
+class StockLevel(BaseModel):
+    id: int
+    QT: int
@@ -0,0 +1,87 @@
+# loja/product-service/app/serialization.py
+"""
+Caminho enxuto de leitura: linhas do banco direto para bytes JSON.
+
+As rotas de leitura selecionam só as colunas expostas (sem montar objetos do
+ORM nem validar cada linha por ProductPublic) e codificam o resultado de uma
+vez: com orjson, se instalado, ou com um TypeAdapter do pydantic compilado na
+importação (serialização em Rust, sem validação; as linhas já vêm tipadas do
+banco). A resposta sai como Response, então o FastAPI não valida nem
+serializa de novo; o `response_model` das rotas continua documentando o formato.
+
+Chamadas internas (Sales-service) podem pedir MessagePack com
+`Accept: application/msgpack` (pacote opcional `msgpack`); sem esse pedido,
+ou sem o pacote, a resposta é JSON, como para os clientes externos.
+"""
+from typing import TypedDict
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Dependência opcional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+class ProductRow(TypedDict):
+    id: int
+    name: str
+    price: float
+    QT: int
+    user_id: int
+
+
+class ProductListPayload(TypedDict):
+    products: list[ProductRow]
+    total_count: int
+
+
+# Ordem das colunas selecionadas pelas rotas (ver PRODUCT_COLUMNS em app/main.py)
+PRODUCT_FIELDS = tuple(ProductRow.__annotations__)
+
+_product_adapter = TypeAdapter(ProductRow)
+_product_list_adapter = TypeAdapter(ProductListPayload)
+
+
+def product_row(row) -> ProductRow:
+    # zip para no menor: colunas extras no fim da linha (ex.: total_count) são ignoradas
+    return dict(zip(PRODUCT_FIELDS, row))
+
+
+def wants_msgpack(accept: str | None) -> bool:
+    """True se o cliente aceita MessagePack (q > 0) e o pacote está instalado."""
+    if msgpack is None or not accept:
+        return False
+    for part in accept.split(","):
+        media_type, _, params = part.partition(";")
+        if media_type.strip().lower() == MSGPACK_MEDIA_TYPE:
+            params = params.strip()
+            return not (params.startswith("q=") and params[2:].strip() in ("0", "0.0", "0.00", "0.000"))
+    return False
+
+
+def _render(adapter: TypeAdapter, payload, accept: str | None) -> Response:
+    # Vary: caches intermediários não devem misturar os dois formatos
+    headers = {"Vary": "Accept"}
+    if wants_msgpack(accept):
+        return Response(msgpack.packb(payload), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    if orjson is not None:
+        return Response(orjson.dumps(payload), media_type="application/json", headers=headers)
+    return Response(adapter.dump_json(payload), media_type="application/json", headers=headers)
+
+
+def product_response(row, accept: str | None = None) -> Response:
+    return _render(_product_adapter, product_row(row), accept)
+
+
+def product_list_response(rows, total_count: int, accept: str | None = None) -> Response:
+    payload = {"products": [product_row(row) for row in rows], "total_count": total_count}
+    return _render(_product_list_adapter, payload, accept)
@@ -6,4 +6,36 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Pool de conexões (app/lifecycle.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_WARMUP: int = 5  # conexões abertas antes de o worker ficar pronto
+
+    # Threads para rotas síncronas (app/execution.py); padrão: DB_POOL_SIZE + DB_MAX_OVERFLOW
+    THREADPOOL_SIZE: int | None = None
+
+    # Compressão das respostas (app/compression.py)
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+
+    # Réplicas de leitura (app/DB.py). Ex.: DATABASE_REPLICA_URLS='["postgresql://..."]'
+    DATABASE_REPLICA_URLS: list[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL: float = 2.0  # segundos entre verificações de atraso
+    REPLICA_CONNECT_TIMEOUT: int = 2  # segundos (connect_timeout do libpq)
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # leituras no primário após uma escrita
+
+    # Janela do agrupamento de baixas de estoque concorrentes (app/stock.py)
+    STOCK_BATCH_WINDOW_MS: float = 2.0
+
+    # Feed de alterações via SSE (app/changes.py)
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = 15.0
+    CHANGE_FEED_MAX_PENDING: int = 1000  # produtos no buffer de cada conexão antes do resync
+    CHANGE_FEED_MAX_STREAMS_PER_USER: int = 5
+
+    # Profiling sob demanda (app/profiling.py)
+    PROFILING_TOKEN: str | None = None  # habilita o cabeçalho X-Profile
+    PROFILING_SAMPLE_RATE: float = 0.0  # fração das requisições perfiladas (perfil de CPU requer pyinstrument)
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_MAX_ARTIFACTS: int = 200
+
     model_config = SettingsConfigDict(env_file=".env")
\ No newline at end of file
@@ -0,0 +1,165 @@
+# loja/product-service/app/stock.py
+"""
+Baixa de estoque sob contenção (produtos "quentes" em promoções relâmpago).
+
+O antigo fluxo fazia leitura + PUT com o novo valor de `qt`, o que serializa
+no lock da linha e perde atualizações quando duas vendas leem o mesmo valor.
+Aqui toda baixa é um único UPDATE condicional (`qt = qt - n WHERE qt >= n`),
+e baixas concorrentes do mesmo produto são agrupadas:
+
+- `apply_movements`: dentro de um lote do outbox, soma os movimentos de cada
+  produto e tenta aplicá-los num único UPDATE.
+- `StockDecrementBatcher`: entre requisições simultâneas do mesmo processo
+  (POST /products/{id}/stock/decrement), a primeira abre uma janela curta e
+  todas as baixas que chegaram nesse intervalo são aplicadas num único UPDATE.
+
+Se o estoque não cobre a soma, as baixas são aplicadas uma a uma, na ordem de
+chegada, e as que não couberem são rejeitadas.
+"""
+import asyncio
+from collections import defaultdict
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from . import DB, changes, models
+from .lifecycle import get_settings
+
+
+def decrement_stock(session: Session, product_id: int, user_id: int, quantity: int) -> int | None:
+    """UPDATE atômico. Retorna o novo estoque ou None se o produto não existe/não tem estoque."""
+    remaining = session.scalar(
+        update(models.Product)
+        .where(
+            models.Product.id == product_id,
+            models.Product.user_id == user_id,
+            models.Product.QT >= quantity
+        )
+        .values(QT=models.Product.QT - quantity)
+        .returning(models.Product.QT)
+    )
+    if remaining is not None:
+        # UPDATE fora do ORM: o evento do feed de alterações é registrado aqui
+        changes.record_stock(session, product_id, user_id, remaining)
+    return remaining
+
+
+def apply_movements(session: Session, user_id: int, movements) -> tuple[list[int], list[int]]:
+    """
+    Aplica movimentos (com movement_id, product_id e QT) agrupando por produto.
+    Retorna (IDs aplicados, IDs rejeitados). Não faz commit.
+    """
+    applied, rejected = [], []
+
+    by_product = defaultdict(list)
+    for movement in movements:
+        by_product[movement.product_id].append(movement)
+
+    for product_id, product_movements in by_product.items():
+        total = sum(m.QT for m in product_movements)
+        if decrement_stock(session, product_id, user_id, total) is not None:
+            applied.extend(m.movement_id for m in product_movements)
+            continue
+
+        for movement in product_movements:
+            if decrement_stock(session, product_id, user_id, movement.QT) is None:
+                rejected.append(movement.movement_id)
+            else:
+                applied.append(movement.movement_id)
+
+    return applied, rejected
+
+
+class StockDecrementBatcher:
+    """
+    Agrupa baixas simultâneas do mesmo produto num único UPDATE.
+
+    Roda no event loop (rota assíncrona): a janela é um `call_later` e quem
+    espera aguarda um future, sem ocupar threads do threadpool (limitado em
+    app/execution.py). Só o UPDATE de cada lote vai para o threadpool.
+    """
+
+    def __init__(self, window: float | None = None):
+        # None: usa STOCK_BATCH_WINDOW_MS das configurações, lida no primeiro uso
+        self._window = window
+        self._pending: dict[tuple[int, int], list[tuple[int, asyncio.Future]]] = {}
+        self._flushes: set[asyncio.Task] = set()
+
+    @property
+    def window(self) -> float:
+        if self._window is None:
+            self._window = get_settings().STOCK_BATCH_WINDOW_MS / 1000
+        return self._window
+
+    async def decrement(self, product_id: int, user_id: int, quantity: int) -> int | None:
+        """Retorna o estoque restante após esta baixa ou None se ela foi rejeitada."""
+        loop = asyncio.get_running_loop()
+        key = (product_id, user_id)
+        future = loop.create_future()
+
+        queue = self._pending.get(key)
+        if queue is None:
+            # Primeira baixa do produto: abre a janela que acumula as concorrentes
+            queue = self._pending[key] = []
+            loop.call_later(self.window, self._start_flush, key)
+        queue.append((quantity, future))
+        return await future
+
+    def _start_flush(self, key: tuple[int, int]):
+        task = asyncio.ensure_future(self._flush(key, self._pending.pop(key)))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    @staticmethod
+    async def _flush(key: tuple[int, int], batch: list[tuple[int, asyncio.Future]]):
+        product_id, user_id = key
+        try:
+            results = await run_in_threadpool(
+                apply_decrements, product_id, user_id, [quantity for quantity, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # A requisição pode ter sido cancelada (cliente desconectou); a baixa vale
+            if not future.done():
+                future.set_result(result)
+
+
+def apply_decrements(product_id: int, user_id: int, quantities: list[int]) -> list[int | None]:
+    """
+    Aplica as baixas de um lote, na ordem. Tenta a soma num único UPDATE; se o
+    estoque não cobre, aplica uma a uma. Retorna o estoque após cada baixa
+    (None para as rejeitadas).
+    """
+    total = sum(quantities)
+    with Session(DB.get_engine()) as session:
+        remaining = decrement_stock(session, product_id, user_id, total)
+        if remaining is not None:
+            # Distribui o resultado como se as baixas tivessem sido feitas em ordem
+            remaining += total
+            results = []
+            for quantity in quantities:
+                remaining -= quantity
+                results.append(remaining)
+        else:
+            results = [decrement_stock(session, product_id, user_id, quantity) for quantity in quantities]
+        session.commit()
+    return results
+
+
+def product_exists(product_id: int, user_id: int) -> bool:
+    with Session(DB.get_engine()) as session:
+        return session.scalar(
+            select(models.Product.id).where(
+                models.Product.id == product_id,
+                models.Product.user_id == user_id
+            )
+        ) is not None
+
+
+stock_batcher = StockDecrementBatcher()
@@ -0,0 +1,106 @@
+# loja/product-service/benchmarks/bench_hot_sku.py
+"""
+Benchmark de contenção num único produto (vendas/segundo num SKU quente).
+
+Compara três estratégias de baixa de estoque, com N threads vendendo 1
+unidade do mesmo produto:
+
+- rmw:     leitura + escrita do novo valor (fluxo antigo via PUT); perde atualizações
+- atomic:  um UPDATE condicional por venda (stock.decrement_stock)
+- batched: baixas concorrentes agrupadas (stock.StockDecrementBatcher)
+
+Usa o banco configurado em DATABASE_URL (.env); cria e remove o próprio produto.
+
+Uso (a partir de product-service/):
+    python -m benchmarks.bench_hot_sku --threads 32 --sales 200
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app import DB, lifecycle, models, stock
+
+BENCH_USER_ID = -1
+
+
+def sell_rmw(product_id: int):
+    with Session(DB.get_engine()) as session:
+        product = session.get(models.Product, product_id)
+        if product.QT >= 1:
+            product.QT = product.QT - 1
+            session.commit()
+
+
+def sell_atomic(product_id: int):
+    with Session(DB.get_engine()) as session:
+        stock.decrement_stock(session, product_id, BENCH_USER_ID, 1)
+        session.commit()
+
+
+def make_sell_batched(window: float):
+    # O batcher roda num event loop (como na rota); as threads enviam as baixas para ele
+    batcher = stock.StockDecrementBatcher(window=window)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    def sell_batched(product_id: int):
+        asyncio.run_coroutine_threadsafe(batcher.decrement(product_id, BENCH_USER_ID, 1), loop).result()
+
+    return sell_batched
+
+
+def run(strategy, threads: int, sales: int) -> None:
+    initial = threads * sales
+    with Session(DB.get_engine()) as session:
+        product = models.Product(
+            user_id=BENCH_USER_ID, name='hot-sku', description=None, price=1.0, QT=initial
+        )
+        session.add(product)
+        session.commit()
+        product_id = product.id
+
+    def worker():
+        for _ in range(sales):
+            strategy(product_id)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with Session(DB.get_engine()) as session:
+        final = session.scalar(select(models.Product.QT).where(models.Product.id == product_id))
+        session.execute(delete(models.Product).where(models.Product.id == product_id))
+        session.commit()
+
+    total = threads * sales
+    print(f"{strategy.__name__:>13}: {total / elapsed:>9,.0f} sales/s  "
+          f"elapsed={elapsed:.2f}s  lost_updates={final}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--sales", type=int, default=200, help="vendas por thread")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    # O pool padrão (5 + 10) limitaria as threads; o benchmark usa um maior
+    settings = lifecycle.get_settings()
+    settings.DB_POOL_SIZE = args.threads
+    settings.DB_MAX_OVERFLOW = 0
+    models.table_registry.metadata.create_all(DB.get_engine())
+
+    for strategy in (sell_rmw, sell_atomic, make_sell_batched(args.window_ms / 1000)):
+        run(strategy, args.threads, args.sales)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# loja/product-service/benchmarks/bench_product_list.py
+"""
+Benchmark do caminho de leitura de produtos (GET /products/ e /products/{id}).
+
+Compara, para páginas de 100 e 1000 linhas:
+
+- orm:  objetos Product do ORM + COUNT em subconsulta + ProductListResponse
+        validado por ProductPublic e serializado como o FastAPI faz
+        (validação do response_model, model_dump e json.dumps) — fluxo antigo
+- lean: colunas selecionadas + total por função de janela + bytes JSON
+        (read_products atual, app/serialization.py; orjson se instalado)
+
+Usa o banco configurado em DATABASE_URL (.env); cria e remove os próprios produtos.
+
+Uso (a partir de product-service/):
+    python -m benchmarks.bench_product_list --rows 100 1000 --repeat 50
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app import DB, models, schemas, serialization
+from app.main import get_product_by_id, read_products
+
+BENCH_USER_ID = -2
+
+
+def seed(rows: int):
+    with Session(DB.get_engine()) as session:
+        session.execute(insert(models.Product), [
+            {"user_id": BENCH_USER_ID, "name": f"Produto {i}", "description": "bench",
+             "price": 10.0 + i % 100, "QT": i}
+            for i in range(rows)
+        ])
+        session.commit()
+
+
+def cleanup():
+    with Session(DB.get_engine()) as session:
+        session.execute(delete(models.Product).where(models.Product.user_id == BENCH_USER_ID))
+        session.commit()
+
+
+def orm_page(session: Session, limit: int) -> bytes:
+    query = select(models.Product).where(models.Product.user_id == BENCH_USER_ID)
+    total_count = session.scalar(select(func.count()).select_from(query.subquery()))
+    products = session.scalars(query.offset(0).limit(limit)).all()
+    response = schemas.ProductListResponse(products=products, total_count=total_count)
+    # O que o FastAPI faz com o retorno: valida pelo response_model e serializa
+    content = schemas.ProductListResponse.model_validate(response).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def lean_page(session: Session, limit: int) -> bytes:
+    return read_products(
+        session=session, current_user={"id": BENCH_USER_ID},
+        skip=0, limit=limit, name=None, product_id=None, ids=None
+    ).body
+
+
+def orm_lookup(session: Session, product_id: int) -> bytes:
+    product = session.scalar(select(models.Product).where(
+        models.Product.id == product_id, models.Product.user_id == BENCH_USER_ID
+    ))
+    content = schemas.ProductPublic.model_validate(product).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def lean_lookup(session: Session, product_id: int) -> bytes:
+    return get_product_by_id(
+        product_id=product_id, session=session, current_user={"id": BENCH_USER_ID}
+    ).body
+
+
+def timed(fn, arg, repeat: int) -> tuple[float, int]:
+    times = []
+    for _ in range(repeat):
+        with Session(DB.get_engine()) as session:
+            start = time.perf_counter()
+            body = fn(session, arg)
+            times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    models.table_registry.metadata.create_all(DB.get_engine())
+    cleanup()
+    seed(max(args.rows))
+    with Session(DB.get_engine()) as session:
+        product_id = session.scalar(select(models.Product.id).where(models.Product.user_id == BENCH_USER_ID))
+
+    encoder = "orjson" if serialization.orjson is not None else "TypeAdapter"
+    print(f"encoder do caminho lean: {encoder}")
+    print(f"{'caso':<22} {'orm ms':>8} {'lean ms':>8} {'ganho':>6} {'bytes':>8}")
+    try:
+        for rows in args.rows:
+            orm_ms, size = timed(orm_page, rows, args.repeat)
+            lean_ms, _ = timed(lean_page, rows, args.repeat)
+            print(f"{f'GET /products/ x{rows}':<22} {orm_ms:>8.2f} {lean_ms:>8.2f} {orm_ms / lean_ms:>5.1f}x {size:>8}")
+
+        orm_ms, size = timed(orm_lookup, product_id, args.repeat * 10)
+        lean_ms, _ = timed(lean_lookup, product_id, args.repeat * 10)
+        print(f"{'GET /products/{id}':<22} {orm_ms:>8.2f} {lean_ms:>8.2f} {orm_ms / lean_ms:>5.1f}x {size:>8}")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# loja/product-service/benchmarks/bench_threadpool.py
+"""
+Benchmark do tamanho do pool de threads das rotas síncronas.
+
+Para cada THREADPOOL_SIZE, sobe o serviço com uvicorn, dispara GET /products/
+com N clientes simultâneos por alguns segundos e mede vazão e latência; ao
+final, lê /metrics/threadpool para separar espera de execução e indica o
+melhor tamanho (maior vazão com p99 dentro de 10% do menor p99 observado).
+
+Usa o banco configurado em DATABASE_URL (.env) e os produtos do --user-id.
+
+Uso (a partir de product-service/):
+    python -m benchmarks.bench_threadpool --sizes 5 10 15 20 40 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+async def load(port: int, user_id: int, concurrency: int, duration: float) -> list[float]:
+    latencies: list[float] = []
+    url = f"http://127.0.0.1:{port}/products/?limit=50"
+    headers = {"X-User-ID": str(user_id)}
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def wait_ready(port: int, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=0.5).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError("Serviço não ficou pronto a tempo")
+
+
+def run_size(size: int, args) -> dict:
+    env = {**os.environ, "THREADPOOL_SIZE": str(size), "DB_POOL_SIZE": str(size), "DB_MAX_OVERFLOW": "0"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        wait_ready(args.port)
+        latencies = asyncio.run(load(args.port, args.user_id, args.concurrency, args.duration))
+        metrics = httpx.get(f"http://127.0.0.1:{args.port}/metrics/threadpool").json()
+    finally:
+        server.terminate()
+        server.wait()
+
+    route = metrics["routes"].get("GET /products/", {})
+    latencies.sort()
+    return {
+        "size": size,
+        "rps": len(latencies) / args.duration,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "wait": route.get("wait_avg_ms", 0.0),
+        "exec": route.get("exec_avg_ms", 0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 15, 20, 40])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--port", type=int, default=18001)
+    args = parser.parse_args()
+
+    results = [run_size(size, args) for size in args.sizes]
+    print(f"{'size':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'wait ms':>8} {'exec ms':>8}")
+    for r in results:
+        print(f"{r['size']:>5} {r['rps']:>9,.0f} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['wait']:>8.1f} {r['exec']:>8.1f}")
+
+    best_p99 = min(r["p99"] for r in results)
+    best = max((r for r in results if r["p99"] <= best_p99 * 1.1), key=lambda r: r["rps"])
+    print(f"\nMelhor THREADPOOL_SIZE: {best['size']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# loja/product-service/benchmarks/bench_wire_format.py
+"""
+Benchmark dos formatos de resposta entre serviços: tamanho e tempo de
+codificação (Product-service) e decodificação (Sales-service).
+
+Compara, para 1, 100 e 1000 produtos (formato de GET /products/{id} e da
+listagem):
+
+- json:     json.dumps / json.loads (biblioteca padrão)
+- adapter:  TypeAdapter.dump_json do pydantic (caminho sem orjson)
+- orjson:   orjson.dumps / orjson.loads, se instalado
+- msgpack:  msgpack.packb / msgpack.unpackb, se instalado
+
+Não precisa do banco nem dos serviços.
+
+Uso (a partir de product-service/):
+    python -m benchmarks.bench_wire_format --rows 1 100 1000 --repeat 2000
+"""
+import argparse
+import json
+import random
+import time
+
+from app.serialization import _product_adapter, _product_list_adapter, msgpack, orjson
+
+
+def payload(rows: int) -> dict:
+    products = [
+        {"id": i, "name": f"Produto {i} {random.choice(['azul', 'verde', 'grande', 'promo'])}",
+         "price": round(random.uniform(1, 500), 2), "QT": random.randint(0, 1000), "user_id": 1}
+        for i in range(rows)
+    ]
+    if rows == 1:
+        return products[0]
+    return {"products": products, "total_count": rows}
+
+
+def codecs(rows: int) -> dict:
+    adapter = _product_adapter if rows == 1 else _product_list_adapter
+    available = {
+        "json": (lambda p: json.dumps(p).encode(), json.loads),
+        "adapter": (adapter.dump_json, json.loads),
+    }
+    if orjson is not None:
+        available["orjson"] = (orjson.dumps, orjson.loads)
+    if msgpack is not None:
+        available["msgpack"] = (msgpack.packb, msgpack.unpackb)
+    return available
+
+
+def timed(function, argument, repeat: int) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(argument)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    if msgpack is None:
+        print("msgpack não instalado: apenas os formatos JSON serão medidos")
+
+    print(f"{'rows':>5} {'format':>8} {'bytes':>9} {'encode µs':>10} {'decode µs':>10}")
+    for rows in args.rows:
+        data = payload(rows)
+        repeat = max(args.repeat // max(rows // 10, 1), 20)
+        for name, (encode, decode) in codecs(rows).items():
+            encode_time, encoded = timed(encode, data, repeat)
+            decode_time, _ = timed(decode, encoded, repeat)
+            print(f"{rows:>5} {name:>8} {len(encoded):>9} {encode_time * 1e6:>10.1f} {decode_time * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# Configuração do gunicorn (usada pelo Procfile)
+import os
+
+# Padrão do gunicorn/Procfile: todas as interfaces, na porta da plataforma ($PORT)
+bind = os.getenv("BIND") or f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Importa o app uma vez no master: os workers sobem mais rápido e compartilham a
+# memória do código importado. As engines do banco só são criadas dentro de cada
+# worker (app/lifecycle.py), que só aceita tráfego depois do warm-up do lifespan.
+preload_app = True
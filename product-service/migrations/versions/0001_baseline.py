@@ -0,0 +1,35 @@
+"""Schema original (tabela products)
+
+Bancos criados antes das migrações devem ser marcados nesta revisão e então
+atualizados; as revisões seguintes criam as tabelas que faltam:
+    alembic stamp 0001
+    alembic upgrade head
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'products',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('qt', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('products')
@@ -0,0 +1,27 @@
+"""Baixas de estoque já aplicadas (deduplicação do outbox de vendas)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'applied_stock_movements',
+        sa.Column('movement_id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('applied_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('applied_stock_movements')
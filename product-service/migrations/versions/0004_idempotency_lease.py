@@ -0,0 +1,22 @@
+"""Concessão curta para reservas 'processing' de Idempotency-Key
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-21
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('idempotency_keys', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('idempotency_keys', 'lease_expires_at')
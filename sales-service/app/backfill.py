@@ -0,0 +1,94 @@
+# loja/sales-service/app/backfill.py
+"""
+Preenche `sale_items.product_name` dos itens gravados antes do snapshot.
+
+Agrupa os produtos sem nome por usuário e resolve os nomes em lote no
+Product-service (GET /products/?ids=...), um pedido por lote de IDs, em vez
+de uma chamada por item. Produtos que já foram removidos continuam sem nome;
+os relatórios mostram "Produto <id>" para eles.
+
+Uso (a partir de sales-service/):
+    python -m app.backfill --batch-size 100
+"""
+import argparse
+import logging
+from collections import defaultdict
+
+import httpx
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from . import DB, clients, models
+from .compression import available_encodings
+
+logger = logging.getLogger(__name__)
+
+
+def _missing_products(session: Session) -> dict[int, list[int]]:
+    """user_id -> IDs de produtos com itens ainda sem nome."""
+    rows = session.execute(
+        select(models.Sale.user_id, models.SaleItem.product_id)
+        .join(models.Sale, models.Sale.id == models.SaleItem.sale_id)
+        .where(models.SaleItem.product_name.is_(None))
+        .distinct()
+    ).all()
+
+    by_user = defaultdict(list)
+    for user_id, product_id in rows:
+        by_user[user_id].append(product_id)
+    return by_user
+
+
+def _fetch_names(client: httpx.Client, product_service_url: str, user_id: int, product_ids: list[int]) -> dict[int, str]:
+    response = client.get(
+        f'{product_service_url}/products/',
+        params={"ids": product_ids, "limit": len(product_ids)},
+        # Listas grandes: pede a resposta comprimida
+        headers={
+            "X-User-ID": str(user_id),
+            "Accept-Encoding": ", ".join(available_encodings()),
+            "Accept": clients.product_accept_header(),
+        },
+    )
+    response.raise_for_status()
+    return {p["id"]: p["name"] for p in clients.decode(response)["products"]}
+
+
+def backfill_product_names(product_service_url: str, batch_size: int = 100) -> int:
+    """Retorna quantos itens de venda foram atualizados."""
+    updated = 0
+    with Session(DB.get_engine()) as session, clients.sync_client(timeout=10) as client:
+        for user_id, product_ids in _missing_products(session).items():
+            user_sales = select(models.Sale.id).where(models.Sale.user_id == user_id)
+
+            for i in range(0, len(product_ids), batch_size):
+                names = _fetch_names(client, product_service_url, user_id, product_ids[i:i + batch_size])
+
+                for product_id, name in names.items():
+                    result = session.execute(
+                        update(models.SaleItem)
+                        .where(
+                            models.SaleItem.product_id == product_id,
+                            models.SaleItem.product_name.is_(None),
+                            models.SaleItem.sale_id.in_(user_sales)
+                        )
+                        .values(product_name=name)
+                        .execution_options(synchronize_session=False)
+                    )
+                    updated += result.rowcount
+                session.commit()
+
+            logger.info("Usuário %s: %s produtos resolvidos", user_id, len(product_ids))
+    return updated
+
+
+if __name__ == '__main__':
+    from .main import PRODUCT_SERVICE_URL
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    total = backfill_product_names(PRODUCT_SERVICE_URL, args.batch_size)
+    print(f"{total} itens de venda atualizados")
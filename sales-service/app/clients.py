@@ -0,0 +1,53 @@
+# loja/sales-service/app/clients.py
+"""
+Clientes HTTP para o Product-service.
+
+Na implantação distribuída as chamadas usam TCP. No modo monolito (ver
+monolith/) o processo registra aqui um transporte em processo para a URL do
+Product-service; as rotas (assíncronas) e o worker do outbox (thread, cliente
+síncrono) passam a chamar o app ASGI diretamente, pelo mesmo código.
+
+As leituras de produtos pedem MessagePack (`Accept: application/msgpack`) se
+o pacote opcional `msgpack` estiver instalado e PRODUCT_WIRE_FORMAT='msgpack';
+o JSON continua aceito, e `decode` usa o Content-Type da resposta, então um
+Product-service sem msgpack responde JSON normalmente.
+"""
+import httpx
+
+from .lifecycle import get_settings
+from .profiling import HTTPX_EVENT_HOOKS
+
+try:
+    import msgpack
+except ImportError:  # Dependência opcional
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+# URL base do serviço -> transporte
+ASYNC_TRANSPORTS: dict[str, httpx.AsyncBaseTransport] = {}
+SYNC_TRANSPORTS: dict[str, httpx.BaseTransport] = {}
+
+
+def async_client(**kwargs) -> httpx.AsyncClient:
+    # Os hooks registram as chamadas nas requisições perfiladas (app/profiling.py)
+    return httpx.AsyncClient(mounts=dict(ASYNC_TRANSPORTS), event_hooks=HTTPX_EVENT_HOOKS, **kwargs)
+
+
+def sync_client(**kwargs) -> httpx.Client:
+    return httpx.Client(mounts=dict(SYNC_TRANSPORTS), **kwargs)
+
+
+def product_accept_header() -> str:
+    """Valor do Accept para as leituras no Product-service."""
+    if msgpack is not None and get_settings().PRODUCT_WIRE_FORMAT == 'msgpack':
+        return f'{MSGPACK_MEDIA_TYPE}, application/json;q=0.9'
+    return 'application/json'
+
+
+def decode(response: httpx.Response):
+    """Corpo da resposta conforme o Content-Type (MessagePack ou JSON)."""
+    content_type = response.headers.get('content-type', '')
+    if msgpack is not None and content_type.startswith(MSGPACK_MEDIA_TYPE):
+        return msgpack.unpackb(response.content)
+    return response.json()
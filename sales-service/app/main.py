@@ -2,23 +2,63 @@
 from http import HTTPStatus
 from typing import Annotated
 from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Header  # NOVO: Importa Header
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, and_
-from datetime import date
-import httpx
+from sqlalchemy import String, cast, literal, select, func, and_
+from datetime import date, datetime, time, timedelta
+from contextlib import asynccontextmanager
+import os
 
-from . import DB, models, schemas
+from . import DB, clients, lifecycle, models, outbox, profiling, schemas
+from .compression import CompressionMiddleware, available_encodings
+from .idempotency import IdempotencyMiddleware
 
 # URL de outro serviço (A URL interna correta para o Product-service)
-PRODUCT_SERVICE_URL = "http://127.0.0.1:8001"
+PRODUCT_SERVICE_URL = os.getenv("PRODUCT_SERVICE_URL", "http://127.0.0.1:8001")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Aquece o pool antes de ficar pronto; depois inicia o worker do outbox,
+    # que aplica as baixas de estoque em segundo plano
+    async with lifecycle.lifespan(app):
+        stop_event = None
+        if lifecycle.get_settings().OUTBOX_WORKER_ENABLED:
+            stop_event = outbox.start_worker_thread(PRODUCT_SERVICE_URL)
+        yield
+        if stop_event:
+            stop_event.set()
+
 
 app = FastAPI(
     title='Microserviço de Vendas',
     description='API para gerenciar vendas e relatórios de contabilidade.',
-    version='1.0.0'
+    version='1.0.0',
+    lifespan=lifespan
 )
+app.include_router(lifecycle.router)
+
+# POST /sales/ aceita o cabeçalho Idempotency-Key (retentativas seguras)
+app.add_middleware(IdempotencyMiddleware, paths={'/sales/'})
+# Compressão negociada (gzip/br/zstd) para o Gateway
+app.add_middleware(CompressionMiddleware, minimum_size=lifecycle.get_settings().COMPRESSION_MIN_SIZE)
+# X-Last-Write nas respostas de escritas (read-your-writes entre workers; app/DB.py)
+app.add_middleware(DB.WriteMarkerMiddleware)
+
+# Profiling sob demanda (cabeçalho X-Profile ou amostragem); envolve os demais middlewares
+profiling.configure(
+    'sales-service',
+    token=lifecycle.get_settings().PROFILING_TOKEN,
+    sample_rate=lifecycle.get_settings().PROFILING_SAMPLE_RATE,
+    directory=lifecycle.get_settings().PROFILING_DIR,
+    max_artifacts=lifecycle.get_settings().PROFILING_MAX_ARTIFACTS
+)
+app.add_middleware(profiling.ProfilingMiddleware)
+app.include_router(profiling.router)
 
 T_Session = Annotated[Session, Depends(DB.get_session)]
+# Sessão para rotas somente-leitura, como relatórios (réplica, quando configurada)
+T_ReadSession = Annotated[Session, Depends(DB.get_read_session)]
 
 
 # --------------------------------------------------------------------------
@@ -50,46 +90,30 @@ T_CurrentUser = Annotated[dict, Depends(get_current_user_from_header)]
 # COMUNICAÇÃO ENTRE SERVIÇOS (PRODUCT-SERVICE)
 # --------------------------------------------------------------------------
 
-async def get_product_from_service(product_id: int, user_id: int, token: str):
-    """Busca um produto no Product-service e retorna os dados."""
-
-    async with httpx.AsyncClient(timeout=5) as client:
-        url = f'{PRODUCT_SERVICE_URL}/products/{product_id}'
+async def get_products_from_service(product_ids: list[int], user_id: int, token: str) -> dict[int, dict]:
+    """
+    Busca os produtos da venda no Product-service numa única chamada
+    (GET /products/?ids=...). Retorna ID -> dados; produtos inexistentes ou
+    de outro usuário ficam de fora.
+    """
+    async with clients.async_client(timeout=5) as client:
+        url = f'{PRODUCT_SERVICE_URL}/products/'
 
         # Headers: Passa o token e o ID do usuário para o Product-service validar a posse
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "X-User-ID": str(user_id)
-        }
-
-        response = await client.get(url, headers=headers)
-
-        if response.status_code == HTTPStatus.OK:
-            return response.json()
-        elif response.status_code == HTTPStatus.NOT_FOUND:
-            return None
-        else:
-            response.raise_for_status()
-
-
-async def update_product_stock_in_service(product_id: int, new_quantity: int, user_id: int, token: str):
-    """Atualiza o estoque (QT) de um produto no Product-service."""
-
-    async with httpx.AsyncClient(timeout=5) as client:
-        url = f'{PRODUCT_SERVICE_URL}/products/{product_id}'
         headers = {
             "Authorization": f"Bearer {token}",
             "X-User-ID": str(user_id),
-            "Content-Type": "application/json"
+            # Aceita as mesmas codificações que o Product-service pode usar
+            "Accept-Encoding": ", ".join(available_encodings()),
+            # MessagePack entre serviços, quando disponível (ver app/clients.py)
+            "Accept": clients.product_accept_header()
         }
-        data = {"QT": new_quantity}
-
-        response = await client.put(url, json=data, headers=headers)
 
-        if response.status_code == HTTPStatus.OK:
-            return response.json()
-        else:
-            response.raise_for_status()
+        response = await client.get(
+            url, params={"ids": product_ids, "limit": len(product_ids)}, headers=headers
+        )
+        response.raise_for_status()
+        return {product["id"]: product for product in clients.decode(response)["products"]}
 
 
 # --------------------------------------------------------------------------
@@ -97,23 +121,16 @@ async def update_product_stock_in_service(product_id: int, new_quantity: int, us
 router = APIRouter(prefix='/sales', tags=['sales'])
 
 
-@router.post(
-    '/', status_code=HTTPStatus.CREATED, response_model=schemas.SalePublic
-)
-async def create_sale(
-        sale: schemas.SaleSchema,
-        session: T_Session,
-        current_user: T_CurrentUser
-):
+def _save_sale(session: Session, sale: schemas.SaleSchema, products: dict[int, dict], user_id: int):
+    """
+    Valida os itens contra os produtos buscados e grava a venda. Síncrona
+    (Session bloqueante): create_sale a executa no threadpool.
+    """
     total_price = 0
     sale_items_to_create = []
 
-    user_id = current_user['id']
-    user_token = current_user['token']
-
     for item in sale.items:
-        # Comunicação com o serviço de produtos para obter dados
-        product = await get_product_from_service(item.product_id, user_id, user_token)
+        product = products.get(item.product_id)
 
         if not product:
             raise HTTPException(
@@ -126,31 +143,34 @@ async def create_sale(
                 detail=f'Produto {product["name"]} não tem estoque suficiente.'
             )
 
-        # Comunicação com o serviço de produtos para atualizar o estoque
-        new_quantity = product['QT'] - item.QT
-        await update_product_stock_in_service(product['id'], new_quantity, user_id, user_token)
-
         sale_items_to_create.append(models.SaleItem(
             sale_id=0,
             product_id=product['id'],
             QT=item.QT,
-            product_price=product['price']
+            product_price=product['price'],
+            product_name=product['name']
         ))
         total_price += product['price'] * item.QT
 
-    # Cria a venda no banco de dados do serviço de vendas
+    # Venda, itens e baixas de estoque (outbox) são gravados numa única transação.
+    # A baixa no Product-service é feita depois pelo worker em app/outbox.py.
     db_sale = models.Sale(
         user_id=user_id,
         total_price=total_price
     )
     session.add(db_sale)
-    session.commit()
-    session.refresh(db_sale)
+    session.flush()
 
-    # Associa os itens à venda recém-criada
     for sale_item in sale_items_to_create:
         sale_item.sale_id = db_sale.id
+        sale_item.sale_created_at = db_sale.created_at
         session.add(sale_item)
+        session.add(models.StockMovement(
+            sale_id=db_sale.id,
+            user_id=user_id,
+            product_id=sale_item.product_id,
+            QT=sale_item.QT
+        ))
 
     session.commit()
     session.refresh(db_sale)
@@ -158,7 +178,132 @@ async def create_sale(
     return db_sale
 
 
-# Outras rotas de relatórios (daily_report, report_by_period, etc.) podem ser adicionadas aqui
-# ...
+@router.post(
+    '/', status_code=HTTPStatus.CREATED, response_model=schemas.SalePublic
+)
+async def create_sale(
+        sale: schemas.SaleSchema,
+        session: T_Session,
+        current_user: T_CurrentUser
+):
+    user_id = current_user['id']
+    user_token = current_user['token']
+
+    # Comunicação com o serviço de produtos para obter dados (preço e estoque):
+    # uma chamada para todos os itens, não uma por item
+    product_ids = list(dict.fromkeys(item.product_id for item in sale.items))
+    products = await get_products_from_service(product_ids, user_id, user_token) if product_ids else {}
+
+    # O acesso ao banco é bloqueante: fora do event loop
+    return await run_in_threadpool(_save_sale, session, sale, products, user_id)
+
+
+# --------------------------------------------------------------------------
+# RELATÓRIOS
+# SQL local apenas: o nome do produto vem do snapshot gravado em sale_items.
+# --------------------------------------------------------------------------
+
+def _period_bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    """Converte um período de datas (inclusive) em [início, fim) de timestamps."""
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+
+def _product_name():
+    # Itens antigos ainda sem snapshot (ver app/backfill.py)
+    return func.coalesce(
+        models.SaleItem.product_name,
+        literal('Produto ') + cast(models.SaleItem.product_id, String)
+    )
+
+
+def _sale_join():
+    # Junta pela chave completa (id + chave de partição): partição com partição
+    return and_(
+        models.Sale.id == models.SaleItem.sale_id,
+        models.Sale.created_at == models.SaleItem.sale_created_at
+    )
+
+
+@router.get('/reports/daily', response_model=schemas.DailySales)
+def daily_report(
+        session: T_ReadSession,
+        current_user: T_CurrentUser,
+        day: date = Query(default_factory=date.today)
+):
+    period_start, period_end = _period_bounds(day, day)
+    total_sales, total_amount = session.execute(
+        select(func.count(models.Sale.id), func.coalesce(func.sum(models.Sale.total_price), 0))
+        .where(
+            models.Sale.user_id == current_user['id'],
+            models.Sale.created_at >= period_start,
+            models.Sale.created_at < period_end
+        )
+    ).one()
+    return schemas.DailySales(total_sales=total_sales, total_amount=total_amount)
+
+
+@router.get('/reports/by-period', response_model=schemas.SalesByPeriodReport)
+def report_by_period(
+        session: T_ReadSession,
+        current_user: T_CurrentUser,
+        start: date,
+        end: date
+):
+    period_start, period_end = _period_bounds(start, end)
+    rows = session.execute(
+        select(
+            _product_name().label('product_name'),
+            models.SaleItem.QT.label('quantity_sold'),
+            models.Sale.created_at.label('sale_date'),
+            (models.SaleItem.QT * models.SaleItem.product_price).label('total_price')
+        )
+        .join(models.Sale, _sale_join())
+        .where(
+            models.Sale.user_id == current_user['id'],
+            models.Sale.created_at >= period_start,
+            models.Sale.created_at < period_end,
+            # Mesmo intervalo na chave de partição dos itens: o planner descarta
+            # as partições fora do período nas duas tabelas
+            models.SaleItem.sale_created_at >= period_start,
+            models.SaleItem.sale_created_at < period_end
+        )
+        .order_by(models.Sale.created_at)
+    ).mappings().all()
+    return schemas.SalesByPeriodReport(sales=[dict(row) for row in rows])
+
+
+@router.get('/reports/best-selling', response_model=schemas.BestSellingProductsReport)
+def best_selling_products(
+        session: T_ReadSession,
+        current_user: T_CurrentUser,
+        start: date,
+        end: date,
+        limit: int = Query(10, gt=0, le=100)
+):
+    period_start, period_end = _period_bounds(start, end)
+    total_quantity = func.sum(models.SaleItem.QT)
+    rows = session.execute(
+        select(
+            models.SaleItem.product_id,
+            func.max(_product_name()).label('product_name'),
+            total_quantity.label('total_quantity_sold'),
+            func.sum(models.SaleItem.QT * models.SaleItem.product_price).label('total_revenue')
+        )
+        .join(models.Sale, _sale_join())
+        .where(
+            models.Sale.user_id == current_user['id'],
+            models.Sale.created_at >= period_start,
+            models.Sale.created_at < period_end,
+            # Mesmo intervalo na chave de partição dos itens: o planner descarta
+            # as partições fora do período nas duas tabelas
+            models.SaleItem.sale_created_at >= period_start,
+            models.SaleItem.sale_created_at < period_end
+        )
+        .group_by(models.SaleItem.product_id)
+        .order_by(total_quantity.desc())
+        .limit(limit)
+    ).mappings().all()
+    return schemas.BestSellingProductsReport(products=[dict(row) for row in rows])
+
 
 app.include_router(router)
\ No newline at end of file
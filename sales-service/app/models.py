@@ -1,29 +1,95 @@
 # sales-service/app/models.py
 from datetime import datetime
 from sqlalchemy.orm import Mapped, registry, mapped_column
-from sqlalchemy import func
+from sqlalchemy import DateTime, Index, LargeBinary, String, func
 
 table_registry = registry()
 
 
 @table_registry.mapped_as_dataclass
 class Sale:
+    """
+    Particionada por mês em created_at (ver migrations/ e app/partitions.py).
+    A chave de partição faz parte da chave primária.
+    """
     __tablename__ = 'sales'
+    __table_args__ = (
+        Index('ix_sales_user_id_created_at', 'user_id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+    # created_at é gerado pelo banco e precisa estar disponível logo após o flush
+    __mapper_args__ = {'eager_defaults': True}
 
-    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    id: Mapped[int] = mapped_column(init=False, primary_key=True, autoincrement=True)
     user_id: Mapped[int]  # ID do usuário, sem chave estrangeira
     total_price: Mapped[float]
     created_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now()
+        init=False, primary_key=True, server_default=func.now()
     )
+    # confirmed | stock_rejected | stock_failed (baixa de estoque não aplicada; ver app/outbox.py)
+    status: Mapped[str] = mapped_column(init=False, default='confirmed', server_default='confirmed')
 
 
 @table_registry.mapped_as_dataclass
 class SaleItem:
+    """Particionada como `sales`, pela data da venda (sale_created_at)."""
     __tablename__ = 'sale_items'
+    __table_args__ = (
+        Index('ix_sale_items_sale_id', 'sale_id', 'sale_created_at'),
+        {'postgresql_partition_by': 'RANGE (sale_created_at)'},
+    )
 
-    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    id: Mapped[int] = mapped_column(init=False, primary_key=True, autoincrement=True)
     sale_id: Mapped[int]  # Será preenchido após a venda ser criada
     product_id: Mapped[int] # ID do produto, sem chave estrangeira
     QT: Mapped[int] = mapped_column(name='qt')
-    product_price: Mapped[float] # Preço no momento da venda
\ No newline at end of file
+    product_price: Mapped[float] # Preço no momento da venda
+    # Nome no momento da venda (snapshot): relatórios não consultam o Product-service
+    product_name: Mapped[str | None] = mapped_column(default=None)
+    # Cópia de Sale.created_at (chave de partição), preenchida junto com sale_id
+    sale_created_at: Mapped[datetime] = mapped_column(primary_key=True, default=None)
+
+
+@table_registry.mapped_as_dataclass
+class StockMovement:
+    """
+    Outbox de baixas de estoque. Gravada na mesma transação da venda e
+    aplicada no Product-service pelo worker em app/outbox.py.
+    """
+    __tablename__ = 'stock_movements'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    sale_id: Mapped[int]
+    user_id: Mapped[int]
+    product_id: Mapped[int]
+    QT: Mapped[int] = mapped_column(name='qt')
+    # pending -> in_flight (reivindicado) -> applied | rejected (sem estoque) | failed (tentativas esgotadas)
+    status: Mapped[str] = mapped_column(default='pending', index=True)
+    attempts: Mapped[int] = mapped_column(default=0)
+    last_error: Mapped[str | None] = mapped_column(default=None)
+    available_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+    processed_at: Mapped[datetime | None] = mapped_column(init=False, default=None)
+
+
+@table_registry.mapped_as_dataclass
+class IdempotencyKey:
+    """Chaves Idempotency-Key e respostas gravadas (ver app/idempotency.py)."""
+    __tablename__ = 'idempotency_keys'
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)  # usuário:método:caminho:chave
+    fingerprint: Mapped[str]  # sha256 do corpo da requisição
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    status: Mapped[str] = mapped_column(default='processing')  # processing | completed
+    # Fim da reserva 'processing' (ver PROCESSING_LEASE em app/idempotency.py)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), default=None)
+    response_status: Mapped[int | None] = mapped_column(default=None)
+    response_body: Mapped[bytes | None] = mapped_column(LargeBinary, default=None)
+    response_content_type: Mapped[str | None] = mapped_column(default=None)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
@@ -0,0 +1,204 @@
+# loja/sales-service/app/outbox.py
+"""
+Worker do outbox de estoque.
+
+`create_sale` grava a venda e as linhas de `stock_movements` numa única
+transação local; este worker consome a fila (SELECT ... FOR UPDATE SKIP LOCKED,
+sem broker externo), agrupa as baixas por usuário e as aplica no
+Product-service em lote. Vários workers (ex.: um por processo do gunicorn)
+podem rodar ao mesmo tempo sem pegar as mesmas linhas.
+
+Os movimentos são reivindicados (status `in_flight`, com concessão de
+OUTBOX_CLAIM_TIMEOUT segundos) e a transação é confirmada antes da chamada
+HTTP; o resultado é gravado depois, noutra transação curta. O Product-service
+deduplica pelo ID do movimento, então reenviar um lote após timeout ou após
+a concessão vencer é seguro.
+
+Baixas rejeitadas (sem estoque) ou com tentativas esgotadas marcam a venda
+(`sales.status` = `stock_rejected` / `stock_failed`) e geram um log de erro,
+para estorno ou reposição.
+
+Execução avulsa:  python -m app.outbox
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from http import HTTPStatus
+
+import httpx
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from . import DB, clients, models
+from .lifecycle import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _backoff(attempts: int) -> timedelta:
+    """Espera exponencial entre tentativas, limitada a 5 minutos."""
+    return timedelta(seconds=min(300, 2 ** attempts))
+
+
+def _send_batch(client: httpx.Client, product_service_url: str, user_id: int, movements):
+    """Envia as baixas de um usuário. Retorna o corpo da resposta do Product-service."""
+    response = client.post(
+        f'{product_service_url}/products/stock-movements',
+        headers={"X-User-ID": str(user_id)},
+        json={"movements": [
+            {"movement_id": m.id, "product_id": m.product_id, "QT": m.QT}
+            for m in movements
+        ]},
+    )
+    if response.status_code != HTTPStatus.OK:
+        response.raise_for_status()
+    return response.json()
+
+
+def _claim(batch_size: int, lease: timedelta) -> list:
+    """
+    Reivindica movimentos pendentes (ou com concessão vencida) e os marca como
+    `in_flight` numa transação curta: os locks não ficam presos durante o HTTP.
+    Se o worker morrer, a concessão vence e outro worker retoma os movimentos.
+    """
+    movement = models.StockMovement
+    with Session(DB.get_engine()) as session:
+        rows = session.execute(
+            select(movement.id, movement.sale_id, movement.user_id, movement.product_id,
+                   movement.QT, movement.attempts)
+            .where(
+                movement.status.in_(('pending', 'in_flight')),
+                movement.available_at <= func.now(),
+            )
+            .order_by(movement.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        if rows:
+            session.execute(
+                update(movement)
+                .where(movement.id.in_([row.id for row in rows]))
+                .values(status='in_flight', attempts=movement.attempts + 1,
+                        available_at=func.now() + lease)
+            )
+            session.commit()
+        return rows
+
+
+def _flag_sales(session: Session, sale_ids: set[int], status: str, reason: str):
+    """Marca as vendas cujas baixas não puderam ser aplicadas, para tratamento (estorno)."""
+    session.execute(
+        update(models.Sale)
+        .where(models.Sale.id.in_(sale_ids), models.Sale.status == 'confirmed')
+        .values(status=status)
+    )
+    # Venda já confirmada ao cliente sem o estoque correspondente: precisa de ação
+    logger.error("Vendas %s marcadas como %s: %s", sorted(sale_ids), status, reason)
+
+
+def _finish(session: Session, movement, **values):
+    # Só altera se ainda for nossa (a concessão pode ter vencido e sido retomada)
+    session.execute(
+        update(models.StockMovement)
+        .where(models.StockMovement.id == movement.id, models.StockMovement.status == 'in_flight')
+        .values(**values)
+    )
+
+
+def process_batch(client: httpx.Client, product_service_url: str, batch_size: int | None = None) -> int:
+    """
+    Reivindica até `batch_size` movimentos pendentes e os aplica.
+    Retorna quantos movimentos foram processados (0 = fila vazia).
+    """
+    settings = get_settings()
+    movements = _claim(
+        batch_size or settings.OUTBOX_BATCH_SIZE,
+        timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT)
+    )
+    if not movements:
+        return 0
+
+    by_user = defaultdict(list)
+    for movement in movements:
+        by_user[movement.user_id].append(movement)
+
+    for user_id, user_movements in by_user.items():
+        # Chamada HTTP fora de qualquer transação
+        try:
+            result = _send_batch(client, product_service_url, user_id, user_movements)
+        except (httpx.HTTPError, ValueError) as e:
+            error = str(e)[:500]
+        else:
+            error = None
+
+        with Session(DB.get_engine()) as session:
+            if error is not None:
+                # Falha de rede ou resposta inválida: agenda nova tentativa
+                exhausted = set()
+                for movement in user_movements:
+                    attempts = movement.attempts + 1
+                    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                        _finish(session, movement, status='failed', last_error=error,
+                                processed_at=func.now())
+                        exhausted.add(movement.sale_id)
+                    else:
+                        _finish(session, movement, status='pending', last_error=error,
+                                available_at=func.now() + _backoff(attempts))
+                if exhausted:
+                    _flag_sales(session, exhausted, 'stock_failed', error)
+            else:
+                rejected = set(result.get('rejected', []))
+                rejected_sales = set()
+                for movement in user_movements:
+                    if movement.id in rejected:
+                        # Produto inexistente ou sem estoque no momento da aplicação
+                        _finish(session, movement, status='rejected',
+                                last_error='Rejected by product-service', processed_at=func.now())
+                        rejected_sales.add(movement.sale_id)
+                    else:
+                        _finish(session, movement, status='applied', processed_at=func.now())
+                if rejected_sales:
+                    _flag_sales(session, rejected_sales, 'stock_rejected', 'baixa rejeitada pelo Product-service')
+            session.commit()
+
+    return len(movements)
+
+
+def run_worker(product_service_url: str, stop_event: threading.Event):
+    """Laço principal: processa lotes até a fila esvaziar e então aguarda."""
+    settings = get_settings()
+    with clients.sync_client(timeout=10) as client:
+        while not stop_event.is_set():
+            try:
+                processed = process_batch(client, product_service_url)
+            except Exception:
+                logger.exception("Erro ao processar o outbox de estoque")
+                processed = 0
+
+            if not processed:
+                stop_event.wait(settings.OUTBOX_POLL_INTERVAL)
+
+
+def start_worker_thread(product_service_url: str) -> threading.Event:
+    """Inicia o worker numa thread daemon. Retorna o evento usado para pará-lo."""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_worker,
+        args=(product_service_url, stop_event),
+        name='stock-outbox-worker',
+        daemon=True,
+    )
+    thread.start()
+    return stop_event
+
+
+if __name__ == '__main__':
+    from .main import PRODUCT_SERVICE_URL
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        run_worker(PRODUCT_SERVICE_URL, threading.Event())
+    except KeyboardInterrupt:
+        pass
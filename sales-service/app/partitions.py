@@ -0,0 +1,196 @@
+# loja/sales-service/app/partitions.py
+"""
+Manutenção das partições mensais de `sales` e `sale_items`.
+
+As tabelas são particionadas por intervalo (RANGE) na data da venda, uma
+partição por mês (`sales_y2025m10`, `sale_items_y2025m10`, ...), mais uma
+partição DEFAULT que só recebe linhas de meses sem partição. A conversão do
+schema está em migrations/versions/0005_partition_sales.py.
+
+- `create`: cria as partições do mês atual e dos PARTITION_MONTHS_AHEAD
+  seguintes. Idempotente; deve rodar periodicamente (cron), bem antes de o
+  mês começar, para que nenhuma venda caia na partição DEFAULT.
+- `archive`: exporta as partições com mais de ARCHIVE_AFTER_MONTHS meses para
+  arquivos Parquet comprimidos (zstd) em ARCHIVE_DIR e as desanexa (DETACH) e
+  remove do banco. Requer o pacote opcional `pyarrow`.
+
+Uso (a partir de sales-service/):
+    python -m app.partitions create --months-ahead 3
+    python -m app.partitions archive --older-than 12 --output-dir archive/
+"""
+import argparse
+import logging
+import re
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import text
+
+from .lifecycle import get_engine, get_settings
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Dependência opcional (apenas para o arquivamento)
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Tabela -> coluna de partição
+PARTITIONED_TABLES = {'sales': 'created_at', 'sale_items': 'sale_created_at'}
+
+_PARTITION_NAME = re.compile(r'_y(\d{4})m(\d{2})$')
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f'{table}_y{month.year}m{month.month:02d}'
+
+
+def create_partitions(connection, first_month: date, last_month: date) -> list[str]:
+    """Cria, se ainda não existirem, as partições mensais de first_month a last_month."""
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        next_month = add_months(month, 1)
+        for table in PARTITIONED_TABLES:
+            name = partition_name(table, month)
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+            ))
+            created.append(name)
+        month = next_month
+    return created
+
+
+def ensure_future_partitions(months_ahead: int | None = None) -> list[str]:
+    if months_ahead is None:
+        months_ahead = get_settings().PARTITION_MONTHS_AHEAD
+    current = month_start(date.today())
+    with get_engine().begin() as connection:
+        return create_partitions(connection, current, add_months(current, months_ahead))
+
+
+def list_partitions(connection, table: str) -> list[tuple[str, date]]:
+    """Partições mensais anexadas à tabela, em ordem cronológica (sem a DEFAULT)."""
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {'table': table}).scalars()
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.search(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def export_partition(connection, name: str, path: Path, chunk_size: int = 50_000) -> int:
+    """
+    Grava a partição em Parquet (zstd), lendo em blocos com cursor no servidor.
+    O arquivo é escrito com sufixo .tmp e renomeado no fim. Retorna o número de linhas.
+    """
+    if pyarrow is None:
+        raise RuntimeError('O arquivamento requer o pacote opcional pyarrow')
+
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    result = connection.execution_options(stream_results=True).execute(
+        text(f'SELECT * FROM {name}')
+    )
+    columns = list(result.keys())
+    writer = None
+    rows_written = 0
+    try:
+        for rows in result.partitions(chunk_size):
+            batch = pyarrow.Table.from_pylist([dict(zip(columns, row)) for row in rows])
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(tmp_path, batch.schema, compression='zstd')
+            writer.write_table(batch)
+            rows_written += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is not None:
+        tmp_path.replace(path)
+    return rows_written
+
+
+def archive_partitions(
+        older_than_months: int | None = None,
+        output_dir: str | None = None,
+        drop: bool = True
+) -> list[Path]:
+    """
+    Exporta e desanexa as partições anteriores ao corte. A partição só é
+    desanexada se a contagem de linhas no DETACH bater com a exportada.
+    Com drop=False a tabela desanexada fica no banco (para conferência).
+    """
+    settings = get_settings()
+    if older_than_months is None:
+        older_than_months = settings.ARCHIVE_AFTER_MONTHS
+    directory = Path(output_dir or settings.ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    cutoff = add_months(month_start(date.today()), -older_than_months)
+
+    engine = get_engine()
+    archived = []
+    for table in PARTITIONED_TABLES:
+        with engine.connect() as connection:
+            old_partitions = [name for name, month in list_partitions(connection, table) if month < cutoff]
+
+        for name in old_partitions:
+            path = directory / f'{name}.parquet'
+            with engine.connect() as connection:
+                exported = export_partition(connection, name, path)
+
+            with engine.begin() as connection:
+                # DETACH bloqueia a tabela pai: a contagem confirma que nada mudou desde a exportação
+                current = connection.execute(text(f'SELECT count(*) FROM {name}')).scalar_one()
+                if current != exported:
+                    raise RuntimeError(
+                        f'{name}: {current} linhas no banco, {exported} exportadas; arquivamento abortado'
+                    )
+                connection.execute(text(f'ALTER TABLE {table} DETACH PARTITION {name}'))
+                if drop:
+                    connection.execute(text(f'DROP TABLE {name}'))
+
+            logger.info('%s: %s linhas arquivadas em %s', name, exported, path)
+            if exported:
+                archived.append(path)
+    return archived
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    create = commands.add_parser('create', help='cria as partições dos próximos meses')
+    create.add_argument('--months-ahead', type=int, default=None)
+
+    archive = commands.add_parser('archive', help='exporta e desanexa partições antigas')
+    archive.add_argument('--older-than', type=int, default=None, help='meses')
+    archive.add_argument('--output-dir', default=None)
+    archive.add_argument('--keep-detached', action='store_true', help='não remove a tabela desanexada')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'create':
+        names = ensure_future_partitions(args.months_ahead)
+        print(f'{len(names)} partições verificadas')
+    else:
+        paths = archive_partitions(args.older_than, args.output_dir, drop=not args.keep_detached)
+        print(f'{len(paths)} arquivos gerados')
@@ -18,6 +18,7 @@ class SalePublic(BaseModel):
     user_id: int
     total_price: float
     created_at: datetime
+    status: str  # confirmed | stock_rejected | stock_failed
     model_config = ConfigDict(from_attributes=True)
 
 
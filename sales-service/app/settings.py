@@ -6,4 +6,40 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
-    model_config = SettingsConfigDict(env_file=".env")
\ No newline at end of file
+    # Pool de conexões (app/lifecycle.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_WARMUP: int = 5  # conexões abertas antes de o worker ficar pronto
+
+    # Compressão das respostas (app/compression.py)
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+
+    # Réplicas de leitura (app/DB.py). Ex.: DATABASE_REPLICA_URLS='["postgresql://..."]'
+    DATABASE_REPLICA_URLS: list[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_CHECK_INTERVAL: float = 2.0  # segundos entre verificações de atraso
+    REPLICA_CONNECT_TIMEOUT: int = 2  # segundos (connect_timeout do libpq)
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # leituras no primário após uma escrita
+
+    # Outbox de estoque (app/outbox.py)
+    OUTBOX_WORKER_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 0.5  # segundos, quando a fila está vazia
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_CLAIM_TIMEOUT: float = 60.0  # segundos; maior que o timeout do cliente HTTP
+
+    # Partições mensais de vendas (app/partitions.py)
+    PARTITION_MONTHS_AHEAD: int = 3  # partições futuras criadas com antecedência
+    ARCHIVE_AFTER_MONTHS: int = 12  # meses mantidos no banco antes do arquivamento
+    ARCHIVE_DIR: str = 'archive'
+
+    # Formato das leituras no Product-service (app/clients.py): 'msgpack' ou 'json'
+    PRODUCT_WIRE_FORMAT: str = 'msgpack'
+
+    # Profiling sob demanda (app/profiling.py)
+    PROFILING_TOKEN: str | None = None  # habilita o cabeçalho X-Profile
+    PROFILING_SAMPLE_RATE: float = 0.0  # fração das requisições perfiladas (perfil de CPU requer pyinstrument)
+    PROFILING_DIR: str = 'profiles'
+    PROFILING_MAX_ARTIFACTS: int = 200
+
+    model_config = SettingsConfigDict(env_file=".env")
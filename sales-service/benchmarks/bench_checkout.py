@@ -0,0 +1,97 @@
+# loja/sales-service/benchmarks/bench_checkout.py
+"""
+Benchmark de latência ponta a ponta do checkout (POST /sales/) por formato
+das leituras no Product-service (PRODUCT_WIRE_FORMAT='json' vs 'msgpack').
+
+Chama o app do Sales-service em processo (httpx.ASGITransport) com o banco
+de DATABASE_URL (.env); as buscas de produto vão por HTTP para um
+Product-service em execução (PRODUCT_SERVICE_URL), que precisa ter o pacote
+msgpack para a comparação fazer sentido. Cria os próprios produtos e remove
+produtos, vendas e baixas de estoque ao final. O worker do outbox não roda
+(o lifespan não é executado), então o estoque dos produtos não muda.
+
+Uso (a partir de sales-service/):
+    python -m benchmarks.bench_checkout --sales 300 --items 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from sqlalchemy import delete, select
+
+from app import DB, clients, models
+from app.lifecycle import get_settings
+from app.main import PRODUCT_SERVICE_URL, app
+
+BENCH_USER_ID = -3
+HEADERS = {"X-User-ID": str(BENCH_USER_ID), "Authorization": "Bearer bench"}
+
+
+def create_products(count: int) -> list[int]:
+    with httpx.Client(base_url=PRODUCT_SERVICE_URL, headers=HEADERS, timeout=10) as client:
+        ids = []
+        for i in range(count):
+            response = client.post("/products/", json={
+                "name": f"Produto bench {i}", "description": "bench", "price": 10.0 + i, "QT": 10 ** 6
+            })
+            response.raise_for_status()
+            ids.append(response.json()["id"])
+        return ids
+
+
+def cleanup(product_ids: list[int]):
+    with httpx.Client(base_url=PRODUCT_SERVICE_URL, headers=HEADERS, timeout=10) as client:
+        for product_id in product_ids:
+            client.delete(f"/products/{product_id}")
+
+    with DB.get_engine().begin() as conn:
+        sale_ids = select(models.Sale.id).where(models.Sale.user_id == BENCH_USER_ID)
+        conn.execute(delete(models.StockMovement).where(models.StockMovement.user_id == BENCH_USER_ID))
+        conn.execute(delete(models.SaleItem).where(models.SaleItem.sale_id.in_(sale_ids)))
+        conn.execute(delete(models.Sale).where(models.Sale.user_id == BENCH_USER_ID))
+
+
+async def checkout_latencies(product_ids: list[int], sales: int, items: int) -> list[float]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://sales", headers=HEADERS) as client:
+        latencies = []
+        for n in range(sales):
+            body = {"items": [
+                {"product_id": product_ids[(n + i) % len(product_ids)], "QT": 1} for i in range(items)
+            ]}
+            start = time.perf_counter()
+            response = await client.post("/sales/", json=body)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+        return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sales", type=int, default=300)
+    parser.add_argument("--items", type=int, default=5, help="itens por venda")
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    if clients.msgpack is None:
+        print("msgpack não instalado: as duas rodadas usarão JSON")
+
+    settings = get_settings()
+    product_ids = create_products(max(args.items, 10))
+    try:
+        print(f"{'format':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sales/s':>8}")
+        for wire_format in ("json", "msgpack"):
+            settings.PRODUCT_WIRE_FORMAT = wire_format
+            asyncio.run(checkout_latencies(product_ids, args.warmup, args.items))
+            latencies = asyncio.run(checkout_latencies(product_ids, args.sales, args.items))
+            cuts = statistics.quantiles(latencies, n=100)
+            print(f"{wire_format:>8} {cuts[49] * 1e3:>8.2f} {cuts[94] * 1e3:>8.2f} {cuts[98] * 1e3:>8.2f} "
+                  f"{len(latencies) / sum(latencies):>8.0f}")
+    finally:
+        cleanup(product_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# loja/sales-service/benchmarks/bench_outbox.py
+"""
+Benchmark do worker do outbox de estoque (movimentos/segundo).
+
+Usa o banco configurado em DATABASE_URL (.env) e substitui o Product-service
+por um transporte httpx em memória, para medir só o custo da fila
+(SELECT ... FOR UPDATE SKIP LOCKED + UPDATE de status) e do envio em lote.
+Rode contra um banco de desenvolvimento: movimentos pendentes reais também
+seriam consumidos.
+
+Uso (a partir de sales-service/):
+    python -m benchmarks.bench_outbox --movements 20000 --workers 4 --batch-size 100
+"""
+import argparse
+import json
+import threading
+import time
+
+import httpx
+from sqlalchemy import delete, insert
+
+from app import DB, models, outbox
+
+BENCH_SALE_ID = -1  # Marca as linhas criadas pelo benchmark para limpeza
+
+
+def fake_product_service(request: httpx.Request) -> httpx.Response:
+    movements = json.loads(request.content)["movements"]
+    return httpx.Response(200, json={
+        "applied": [m["movement_id"] for m in movements],
+        "duplicates": [],
+        "rejected": [],
+    })
+
+
+def seed(count: int, users: int):
+    rows = [
+        {"sale_id": BENCH_SALE_ID, "user_id": i % users, "product_id": i % 50, "qt": 1,
+         "status": "pending", "attempts": 0}
+        for i in range(count)
+    ]
+    with DB.get_engine().begin() as conn:
+        conn.execute(insert(models.StockMovement.__table__), rows)
+
+
+def cleanup():
+    with DB.get_engine().begin() as conn:
+        conn.execute(delete(models.StockMovement).where(models.StockMovement.sale_id == BENCH_SALE_ID))
+
+
+def drain(batch_size: int, processed: list):
+    client = httpx.Client(transport=httpx.MockTransport(fake_product_service))
+    total = 0
+    while True:
+        n = outbox.process_batch(client, "http://product-service", batch_size)
+        if not n:
+            break
+        total += n
+    processed.append(total)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movements", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--users", type=int, default=10)
+    args = parser.parse_args()
+
+    models.table_registry.metadata.create_all(DB.get_engine())
+    cleanup()
+    seed(args.movements, args.users)
+
+    processed: list[int] = []
+    threads = [
+        threading.Thread(target=drain, args=(args.batch_size, processed))
+        for _ in range(args.workers)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(processed)
+    print(f"workers={args.workers} batch_size={args.batch_size} "
+          f"movements={total} elapsed={elapsed:.2f}s rate={total / elapsed:,.0f} movements/s")
+    cleanup()
+
+
+if __name__ == "__main__":
+    main()
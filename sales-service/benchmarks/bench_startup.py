@@ -0,0 +1,71 @@
+# loja/sales-service/benchmarks/bench_startup.py
+"""
+Benchmark de inicialização do serviço.
+
+Mede, em processos novos:
+- import:  tempo para importar app.main (sem tocar no banco);
+- ready:   tempo até o uvicorn subir e /health/ready responder 200
+           (inclui o warm-up do pool e do schema feito no lifespan).
+
+Usa o banco configurado em DATABASE_URL (.env).
+
+Uso (a partir de sales-service/):
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_ready(port: int, timeout: float = 30.0) -> float:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=0.5).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError("Serviço não ficou pronto a tempo")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(name: str, samples: list[float]):
+    print(f"{name:>6}: median={statistics.median(samples) * 1000:8.1f} ms  "
+          f"min={min(samples) * 1000:8.1f} ms  max={max(samples) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=18000)
+    args = parser.parse_args()
+
+    report("import", [measure_import() for _ in range(args.runs)])
+    report("ready", [measure_ready(args.port) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
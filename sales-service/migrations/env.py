@@ -0,0 +1,56 @@
+# loja/sales-service/migrations/env.py
+import re
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.lifecycle import get_settings
+from app.models import table_registry
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = table_registry.metadata
+
+# Partições mensais (e a DEFAULT) de sales/sale_items são criadas pela migração
+# 0005 e por app/partitions.py, fora dos modelos; o autogenerate as ignora
+_PARTITION_TABLE = re.compile(r'^(sales|sale_items)_(y\d{4}m\d{2}|default)$')
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not _PARTITION_TABLE.match(name)
+    return True
+
+
+def run_migrations_offline():
+    context.configure(
+        url=get_settings().DATABASE_URL,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # Engine própria, sem pool: as migrações não usam o pool da aplicação
+    connectable = create_engine(get_settings().DATABASE_URL, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,42 @@
+"""Schema original (antes do outbox, da idempotência e do snapshot de nomes)
+
+Bancos criados antes das migrações devem ser marcados nesta revisão e então
+atualizados; as revisões seguintes criam o que o schema original não tinha:
+    alembic stamp 0001
+    alembic upgrade head
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sales',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_price', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_table(
+        'sale_items',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('sale_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('qt', sa.Integer(), nullable=False),
+        sa.Column('product_price', sa.Float(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('sale_items')
+    op.drop_table('sales')
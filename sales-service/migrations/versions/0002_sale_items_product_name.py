@@ -0,0 +1,24 @@
+"""Snapshot do nome do produto em sale_items
+
+Itens já gravados ficam sem nome; preencha-os com `python -m app.backfill`.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('sale_items', sa.Column('product_name', sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('sale_items', 'product_name')
@@ -0,0 +1,150 @@
+"""Particiona sales e sale_items por mês
+
+- `sales` passa a ser particionada por RANGE (created_at), com chave primária
+  (id, created_at); `sale_items` ganha `sale_created_at` (cópia da data da
+  venda) e é particionada por ela, com chave primária (id, sale_created_at).
+- Índices: sales (user_id, created_at) e sale_items (sale_id, sale_created_at).
+- As tabelas antigas são renomeadas, os dados copiados para as partições do
+  primeiro mês com vendas até PARTITION_MONTHS_AHEAD à frente, e as tabelas
+  antigas removidas. As sequências de id são mantidas.
+
+A cópia roda numa única transação; em bases grandes, agende uma janela de
+manutenção. Itens sem venda correspondente não têm data de partição: a
+migração aborta antes de qualquer alteração informando quantos são.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-20
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_monthly_partitions(table: str, first_month: date, last_month: date):
+    month = first_month
+    while month <= last_month:
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+        month = next_month
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def upgrade():
+    orphans = op.get_bind().execute(sa.text("""
+        SELECT count(*) FROM sale_items i
+        WHERE NOT EXISTS (SELECT 1 FROM sales s WHERE s.id = i.sale_id)
+    """)).scalar()
+    if orphans:
+        raise RuntimeError(
+            f"{orphans} linha(s) de sale_items sem venda correspondente; "
+            "corrija ou remova esses itens antes de particionar"
+        )
+
+    op.rename_table('sales', 'sales_legacy')
+    op.rename_table('sale_items', 'sale_items_legacy')
+    # As sequências pertencem às colunas antigas; desvincula antes de removê-las
+    op.execute("ALTER SEQUENCE sales_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE sale_items_id_seq OWNED BY NONE")
+    # Libera os nomes sales_pkey/sale_items_pkey para as novas tabelas
+    op.execute("ALTER TABLE sales_legacy DROP CONSTRAINT sales_pkey")
+    op.execute("ALTER TABLE sale_items_legacy DROP CONSTRAINT sale_items_pkey")
+
+    op.execute("""
+        CREATE TABLE sales (
+            id integer NOT NULL DEFAULT nextval('sales_id_seq'),
+            user_id integer NOT NULL,
+            total_price double precision NOT NULL,
+            created_at timestamp without time zone NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("""
+        CREATE TABLE sale_items (
+            id integer NOT NULL DEFAULT nextval('sale_items_id_seq'),
+            sale_id integer NOT NULL,
+            product_id integer NOT NULL,
+            qt integer NOT NULL,
+            product_price double precision NOT NULL,
+            product_name varchar,
+            sale_created_at timestamp without time zone NOT NULL,
+            PRIMARY KEY (id, sale_created_at)
+        ) PARTITION BY RANGE (sale_created_at)
+    """)
+    op.execute("ALTER SEQUENCE sales_id_seq OWNED BY sales.id")
+    op.execute("ALTER SEQUENCE sale_items_id_seq OWNED BY sale_items.id")
+    op.create_index('ix_sales_user_id_created_at', 'sales', ['user_id', 'created_at'])
+    op.create_index('ix_sale_items_sale_id', 'sale_items', ['sale_id', 'sale_created_at'])
+
+    first_sale = op.get_bind().execute(sa.text("SELECT min(created_at) FROM sales_legacy")).scalar()
+    current_month = date.today().replace(day=1)
+    first_month = first_sale.date().replace(day=1) if first_sale else current_month
+    for table in ('sales', 'sale_items'):
+        _create_monthly_partitions(table, first_month, _add_months(current_month, MONTHS_AHEAD))
+
+    op.execute("""
+        INSERT INTO sales (id, user_id, total_price, created_at)
+        SELECT id, user_id, total_price, created_at FROM sales_legacy
+    """)
+    op.execute("""
+        INSERT INTO sale_items (id, sale_id, product_id, qt, product_price, product_name, sale_created_at)
+        SELECT i.id, i.sale_id, i.product_id, i.qt, i.product_price, i.product_name, s.created_at
+        FROM sale_items_legacy i JOIN sales_legacy s ON s.id = i.sale_id
+    """)
+    op.drop_table('sale_items_legacy')
+    op.drop_table('sales_legacy')
+
+
+def downgrade():
+    # Volta para tabelas simples; partições já arquivadas (app/partitions.py) não retornam
+    op.rename_table('sales', 'sales_partitioned')
+    op.rename_table('sale_items', 'sale_items_partitioned')
+    op.execute("ALTER SEQUENCE sales_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE sale_items_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE sales (
+            id integer PRIMARY KEY DEFAULT nextval('sales_id_seq'),
+            user_id integer NOT NULL,
+            total_price double precision NOT NULL,
+            created_at timestamp without time zone NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE sale_items (
+            id integer PRIMARY KEY DEFAULT nextval('sale_items_id_seq'),
+            sale_id integer NOT NULL,
+            product_id integer NOT NULL,
+            qt integer NOT NULL,
+            product_price double precision NOT NULL,
+            product_name varchar
+        )
+    """)
+    op.execute("ALTER SEQUENCE sales_id_seq OWNED BY sales.id")
+    op.execute("ALTER SEQUENCE sale_items_id_seq OWNED BY sale_items.id")
+
+    op.execute("INSERT INTO sales SELECT id, user_id, total_price, created_at FROM sales_partitioned")
+    op.execute("""
+        INSERT INTO sale_items
+        SELECT id, sale_id, product_id, qt, product_price, product_name FROM sale_items_partitioned
+    """)
+    # Remove as tabelas particionadas junto com todas as partições
+    op.execute("DROP TABLE sale_items_partitioned CASCADE")
+    op.execute("DROP TABLE sales_partitioned CASCADE")
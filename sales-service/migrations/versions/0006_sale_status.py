@@ -0,0 +1,26 @@
+"""Situação da venda (baixas de estoque rejeitadas ou esgotadas)
+
+`confirmed` por padrão; o worker do outbox (app/outbox.py) marca
+`stock_rejected` ou `stock_failed`. Em tabela particionada a coluna é
+propagada para todas as partições.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-10-21
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('sales', sa.Column('status', sa.String(), server_default='confirmed', nullable=False))
+
+
+def downgrade():
+    op.drop_column('sales', 'status')
@@ -0,0 +1,22 @@
+"""Concessão curta para reservas 'processing' de Idempotency-Key
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-10-21
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('idempotency_keys', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('idempotency_keys', 'lease_expires_at')
@@ -0,0 +1,42 @@
+# loja/tools/check_shared_modules.py
+"""
+Confere que os módulos copiados entre os serviços continuam idênticos.
+
+Cada serviço é implantado sozinho (pyproject e imagem próprios), então
+módulos comuns são copiados em vez de importados de um pacote compartilhado.
+Só a primeira linha (comentário com o caminho) pode mudar entre as cópias.
+
+Uso (a partir da raiz do repositório):
+    python tools/check_shared_modules.py
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SHARED_MODULES = {
+    'compression.py': ['gateway', 'product-service', 'sales-service'],
+    'idempotency.py': ['sales-service', 'product-service'],
+    'profiling.py': ['gateway', 'User', 'product-service', 'sales-service'],
+}
+
+
+def body(path: Path) -> list[str]:
+    return path.read_text(encoding='utf-8').splitlines()[1:]
+
+
+def main() -> int:
+    failures = 0
+    for module, services in SHARED_MODULES.items():
+        reference, *others = [ROOT / service / 'app' / module for service in services]
+        for path in others:
+            if body(path) != body(reference):
+                print(f'{path.relative_to(ROOT)} difere de {reference.relative_to(ROOT)}')
+                failures += 1
+    if not failures:
+        print('Módulos compartilhados em sincronia')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())